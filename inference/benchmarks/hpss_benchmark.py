@@ -0,0 +1,164 @@
+"""
+Amazon Software License
+
+1. Definitions
+“Licensor” means any person or entity that distributes its Work.
+
+“Software” means the original work of authorship made available under this License.
+
+“Work” means the Software and any additions to or derivative works of the Software that are made available
+under this License.
+
+The terms “reproduce,” “reproduction,” “derivative works,” and “distribution” have the meaning as provided
+under U.S. copyright law; provided, however, that for the purposes of this License, derivative works shall
+not include works that remain separable from, or merely link (or bind by name) to the interfaces of, the Work.
+
+Works, including the Software, are “made available” under this License by including in or with the Work either
+(a) a copyright notice referencing the applicability of this License to the Work, or (b) a copy of this License.
+
+2. License Grants
+2.1 Copyright Grant. Subject to the terms and conditions of this License, each Licensor grants to you a perpetual,
+worldwide, non-exclusive, royalty-free, copyright license to reproduce, prepare derivative works of, publicly
+display, publicly perform, sublicense and distribute its Work and any resulting derivative works in any form.
+2.2 Patent Grant. Subject to the terms and conditions of this License, each Licensor grants to you a perpetual,
+worldwide, non-exclusive, royalty-free patent license to make, have made, use, sell, offer for sale, import,
+and otherwise transfer its Work, in whole or in part. The foregoing license applies only to the patent claims
+licensable by Licensor that would be infringed by Licensor’s Work (or portion thereof) individually and excluding
+any combinations with any other materials or technology.
+
+3. Limitations
+3.1 Redistribution. You may reproduce or distribute the Work only if (a) you do so under this License, (b) you include
+a complete copy of this License with your distribution, and (c) you retain without modification any copyright, patent,
+trademark, or attribution notices that are present in the Work.
+3.2 Derivative Works. You may specify that additional or different terms apply to the use, reproduction, and distribution
+of your derivative works of the Work (“Your Terms”) only if (a) Your Terms provide that the use limitation in Section 3.3
+applies to your derivative works, and (b) you identify the specific derivative works that are subject to Your Terms.
+Notwithstanding Your Terms, this License (including the redistribution requirements in Section 3.1) will continue to
+apply to the Work itself.
+3.3 Use Limitation. The Work and any derivative works thereof only may be used or intended for use with the web services,
+computing platforms or applications provided by Amazon.com, Inc. or its affiliates, including Amazon Web Services, Inc.
+3.4 Patent Claims. If you bring or threaten to bring a patent claim against any Licensor (including any claim,
+cross-claim or counterclaim in a lawsuit) to enforce any patents that you allege are infringed by any Work, then your
+rights under this License from such Licensor (including the grants in Sections 2.1 and 2.2) will terminate immediately.
+3.5 Trademarks. This License does not grant any rights to use any Licensor’s or its affiliates’ names, logos, or
+trademarks, except as necessary to reproduce the notices described in this License.
+3.6 Termination. If you violate any term of this License, then your rights under this License (including the grants
+in Sections 2.1 and 2.2) will terminate immediately.
+
+4. Disclaimer of Warranty.
+THE WORK IS PROVIDED “AS IS” WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING WARRANTIES
+OR CONDITIONS OF M ERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, TITLE OR NON-INFRINGEMENT. YOU BEAR THE RISK OF
+UNDERTAKING ANY ACTIVITIES UNDER THIS LICENSE. SOME STATES’ CONSUMER LAWS DO NOT ALLOW EXCLUSION OF AN IMPLIED WARRANTY,
+SO THIS DISCLAIMER MAY NOT APPLY TO YOU.
+
+5. Limitation of Liability.
+EXCEPT AS PROHIBITED BY APPLICABLE LAW, IN NO EVENT AND UNDER NO LEGAL THEORY, WHETHER IN TORT (INCLUDING NEGLIGENCE),
+CONTRACT, OR OTHERWISE SHALL ANY LICENSOR BE LIABLE TO YOU FOR DAMAGES, INCLUDING ANY DIRECT, INDIRECT, SPECIAL,
+INCIDENTAL, OR CONSEQUENTIAL DAMAGES ARISING OUT OF OR RELATED TO THIS LICENSE, THE USE OR INABILITY TO USE THE WORK
+(INCLUDING BUT NOT LIMITED TO LOSS OF GOODWILL, BUSINESS INTERRUPTION, LOST PROFITS OR DATA, COMPUTER FAILURE OR
+MALFUNCTION, OR ANY OTHER COMM ERCIAL DAMAGES OR LOSSES), EVEN IF THE LICENSOR HAS BEEN ADVISED OF THE POSSIBILITY
+OF SUCH DAMAGES.
+
+Effective Date – April 18, 2008 © 2008 Amazon.com, Inc. or its affiliates. All rights reserved.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+from librosa import stft
+from librosa import decompose
+
+FUNCTION_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'functions', 'find-sounds')
+sys.path.insert(0, FUNCTION_PATH)
+from hpss import harmonic_percussive  # noqa: E402
+
+SAMPLE_RATE = 48000
+CLIP_LENGTH = 3
+
+
+def synthetic_clips(count):
+    """
+    Clips with a steady tone (harmonic) over noise bursts (percussive)
+
+    Args:
+        count (int): Number of clips
+
+    Returns:
+        NumPy.array: (count, samples) float32 array
+    """
+    rng = np.random.default_rng(0)
+    t = np.arange(SAMPLE_RATE * CLIP_LENGTH) / SAMPLE_RATE
+    clips = []
+    for _ in range(count):
+        tone = 0.2 * np.sin(2 * np.pi * rng.uniform(1000, 4000) * t)
+        bursts = rng.standard_normal(len(t)) * (rng.random(len(t) // 4800 + 1).repeat(4800)[:len(t)] > 0.8)
+        clips.append(tone + 0.1 * bursts)
+    return np.array(clips, dtype=np.float32)
+
+
+def time_call(function, repeats):
+    """
+    Best wall clock time of several calls
+
+    Args:
+        function (function): Call to time
+        repeats (int): Number of calls
+
+    Returns:
+        float: Seconds taken by the fastest call
+    """
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='harmonic_percussive against librosa.decompose.hpss')
+    parser.add_argument('--batch', type=int, default=16, help='Clips in the batch')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--json', help='Write the results to this file')
+    args = parser.parse_args()
+
+    clips = synthetic_clips(args.batch)
+
+    # rendering both types used to run stft and hpss once per type
+    def reference():
+        for clip in clips:
+            for _ in ('harmonic', 'percussive'):
+                decompose.hpss(stft(y=clip))
+
+    def per_clip():
+        for clip in clips:
+            harmonic_percussive(clip)
+
+    def batched():
+        harmonic_percussive(clips)
+
+    results = {'clips': args.batch,
+               'librosa_both_types_s': time_call(reference, args.repeats),
+               'engine_per_clip_s': time_call(per_clip, args.repeats),
+               'engine_batch_s': time_call(batched, args.repeats)}
+
+    D_harmonic, D_percussive = decompose.hpss(stft(y=clips[0]))
+    _, engine_harmonic, engine_percussive = harmonic_percussive(clips[0])
+    scale = np.abs(D_harmonic + D_percussive).max()
+    results['max_abs_diff_harmonic'] = float(np.abs(D_harmonic - engine_harmonic).max() / scale)
+    results['max_abs_diff_percussive'] = float(np.abs(D_percussive - engine_percussive).max() / scale)
+    results['speedup'] = results['librosa_both_types_s'] / results['engine_batch_s']
+
+    for name, value in results.items():
+        print(f'{name:28s} {value:.6g}')
+    if args.json:
+        with open(args.json, 'w') as out:
+            json.dump(results, out, indent=2)
+
+
+if __name__ == '__main__':
+    main()
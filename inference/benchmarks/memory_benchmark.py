@@ -0,0 +1,184 @@
+"""
+Amazon Software License
+
+1. Definitions
+“Licensor” means any person or entity that distributes its Work.
+
+“Software” means the original work of authorship made available under this License.
+
+“Work” means the Software and any additions to or derivative works of the Software that are made available
+under this License.
+
+The terms “reproduce,” “reproduction,” “derivative works,” and “distribution” have the meaning as provided
+under U.S. copyright law; provided, however, that for the purposes of this License, derivative works shall
+not include works that remain separable from, or merely link (or bind by name) to the interfaces of, the Work.
+
+Works, including the Software, are “made available” under this License by including in or with the Work either
+(a) a copyright notice referencing the applicability of this License to the Work, or (b) a copy of this License.
+
+2. License Grants
+2.1 Copyright Grant. Subject to the terms and conditions of this License, each Licensor grants to you a perpetual,
+worldwide, non-exclusive, royalty-free, copyright license to reproduce, prepare derivative works of, publicly
+display, publicly perform, sublicense and distribute its Work and any resulting derivative works in any form.
+2.2 Patent Grant. Subject to the terms and conditions of this License, each Licensor grants to you a perpetual,
+worldwide, non-exclusive, royalty-free patent license to make, have made, use, sell, offer for sale, import,
+and otherwise transfer its Work, in whole or in part. The foregoing license applies only to the patent claims
+licensable by Licensor that would be infringed by Licensor’s Work (or portion thereof) individually and excluding
+any combinations with any other materials or technology.
+
+3. Limitations
+3.1 Redistribution. You may reproduce or distribute the Work only if (a) you do so under this License, (b) you include
+a complete copy of this License with your distribution, and (c) you retain without modification any copyright, patent,
+trademark, or attribution notices that are present in the Work.
+3.2 Derivative Works. You may specify that additional or different terms apply to the use, reproduction, and distribution
+of your derivative works of the Work (“Your Terms”) only if (a) Your Terms provide that the use limitation in Section 3.3
+applies to your derivative works, and (b) you identify the specific derivative works that are subject to Your Terms.
+Notwithstanding Your Terms, this License (including the redistribution requirements in Section 3.1) will continue to
+apply to the Work itself.
+3.3 Use Limitation. The Work and any derivative works thereof only may be used or intended for use with the web services,
+computing platforms or applications provided by Amazon.com, Inc. or its affiliates, including Amazon Web Services, Inc.
+3.4 Patent Claims. If you bring or threaten to bring a patent claim against any Licensor (including any claim,
+cross-claim or counterclaim in a lawsuit) to enforce any patents that you allege are infringed by any Work, then your
+rights under this License from such Licensor (including the grants in Sections 2.1 and 2.2) will terminate immediately.
+3.5 Trademarks. This License does not grant any rights to use any Licensor’s or its affiliates’ names, logos, or
+trademarks, except as necessary to reproduce the notices described in this License.
+3.6 Termination. If you violate any term of this License, then your rights under this License (including the grants
+in Sections 2.1 and 2.2) will terminate immediately.
+
+4. Disclaimer of Warranty.
+THE WORK IS PROVIDED “AS IS” WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING WARRANTIES
+OR CONDITIONS OF M ERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, TITLE OR NON-INFRINGEMENT. YOU BEAR THE RISK OF
+UNDERTAKING ANY ACTIVITIES UNDER THIS LICENSE. SOME STATES’ CONSUMER LAWS DO NOT ALLOW EXCLUSION OF AN IMPLIED WARRANTY,
+SO THIS DISCLAIMER MAY NOT APPLY TO YOU.
+
+5. Limitation of Liability.
+EXCEPT AS PROHIBITED BY APPLICABLE LAW, IN NO EVENT AND UNDER NO LEGAL THEORY, WHETHER IN TORT (INCLUDING NEGLIGENCE),
+CONTRACT, OR OTHERWISE SHALL ANY LICENSOR BE LIABLE TO YOU FOR DAMAGES, INCLUDING ANY DIRECT, INDIRECT, SPECIAL,
+INCIDENTAL, OR CONSEQUENTIAL DAMAGES ARISING OUT OF OR RELATED TO THIS LICENSE, THE USE OR INABILITY TO USE THE WORK
+(INCLUDING BUT NOT LIMITED TO LOSS OF GOODWILL, BUSINESS INTERRUPTION, LOST PROFITS OR DATA, COMPUTER FAILURE OR
+MALFUNCTION, OR ANY OTHER COMM ERCIAL DAMAGES OR LOSSES), EVEN IF THE LICENSOR HAS BEEN ADVISED OF THE POSSIBILITY
+OF SUCH DAMAGES.
+
+Effective Date – April 18, 2008 © 2008 Amazon.com, Inc. or its affiliates. All rights reserved.
+"""
+
+import argparse
+import io
+import itertools
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import soundfile as sf
+
+FUNCTION_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'functions', 'find-sounds')
+
+# Shape of the synthetic uploads: 16 bit stereo at 44.1 kHz, resampled by the pipeline
+SOURCE_RATE = 44100
+SOURCE_CHANNELS = 2
+WRITE_BLOCK_SECONDS = 10
+
+
+def write_synthetic_audio(file_name, minutes):
+    """
+    Write a noise recording of the requested length without holding it in memory
+
+    Args:
+        file_name (str): Target .wav file
+        minutes (float): Length of the recording
+    """
+    rng = np.random.default_rng(0)
+    remaining = int(minutes * 60 * SOURCE_RATE)
+    with sf.SoundFile(file_name, 'w', SOURCE_RATE, SOURCE_CHANNELS, subtype='PCM_16') as out:
+        while remaining > 0:
+            frames = min(remaining, WRITE_BLOCK_SECONDS * SOURCE_RATE)
+            out.write(0.1 * rng.standard_normal((frames, SOURCE_CHANNELS), dtype=np.float32))
+            remaining -= frames
+
+
+def run_worker(mode, file_name, render_clips, gc_generation):
+    """
+    Window one file the way the Lambda does and report peak RSS
+
+    Runs in its own process so that ru_maxrss only covers this file. The first
+    render_clips clips go through classify_clipset with a stand-in classifier, the
+    rest are only windowed.
+
+    Args:
+        mode (str): 'standard' for build_clipset, 'low-memory' for stream_clipset
+        file_name (str): Audio file to process
+        render_clips (int): Number of clips to render as spectrograms
+        gc_generation (int): GC_GENERATION of the function
+    """
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    os.environ['LOW_MEMORY'] = 'true' if mode == 'low-memory' else 'false'
+    os.environ['GC_GENERATION'] = str(gc_generation)
+    sys.path.insert(0, FUNCTION_PATH)
+    import app
+    app.classify_with_models = lambda image_buffer, models: tuple(0.0 for _ in models)
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    with open(file_name, 'rb') as audio:
+        data = io.BytesIO(audio.read())
+    clipset = iter(app.stream_clipset(data) if mode == 'low-memory' else app.build_clipset(data))
+
+    render_start = time.perf_counter()
+    rendered = sum(1 for _ in app.classify_clipset(itertools.islice(clipset, render_clips), workers=1))
+    render_seconds = time.perf_counter() - render_start
+    clips = rendered + sum(1 for _ in clipset)
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({'clips': clips,
+                      'seconds': time.perf_counter() - start,
+                      'ms_per_rendered_clip': 1000 * render_seconds / max(rendered, 1),
+                      'baseline_mb': baseline / 1024,
+                      'peak_mb': peak / 1024}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Peak RSS of the detector by file duration')
+    parser.add_argument('--minutes', type=float, nargs='+', default=[5, 15, 30, 60])
+    parser.add_argument('--modes', nargs='+', default=['standard', 'low-memory'],
+                        choices=['standard', 'low-memory'])
+    parser.add_argument('--render-clips', type=int, default=100,
+                        help='Clips rendered and classified per file, through classify_clipset')
+    parser.add_argument('--gc-generation', type=int, default=1, choices=[-1, 0, 1, 2],
+                        help='GC_GENERATION collected after every clip in low memory mode, -1 for none')
+    parser.add_argument('--json', help='Write the results to this file')
+    parser.add_argument('--worker', nargs=2, metavar=('MODE', 'FILE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker[0], args.worker[1], args.render_clips, args.gc_generation)
+        return
+
+    results = []
+    print('minutes  mode        clips  seconds  ms/render  peak MB')
+    with tempfile.TemporaryDirectory() as work_dir:
+        for minutes in args.minutes:
+            file_name = os.path.join(work_dir, f'{minutes}.wav')
+            write_synthetic_audio(file_name, minutes)
+            for mode in args.modes:
+                output = subprocess.run([sys.executable, __file__, '--worker', mode, file_name,
+                                         '--render-clips', str(args.render_clips),
+                                         '--gc-generation', str(args.gc_generation)],
+                                        check=True, capture_output=True, text=True).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                result.update({'minutes': minutes, 'mode': mode})
+                results.append(result)
+                print(f"{minutes:7.1f}  {mode:10s}  {result['clips']:5d}  {result['seconds']:7.1f}  "
+                      f"{result['ms_per_rendered_clip']:9.0f}  {result['peak_mb']:7.0f}")
+            os.remove(file_name)
+
+    if args.json:
+        with open(args.json, 'w') as out:
+            json.dump(results, out, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,326 @@
+"""
+Amazon Software License
+
+1. Definitions
+“Licensor” means any person or entity that distributes its Work.
+
+“Software” means the original work of authorship made available under this License.
+
+“Work” means the Software and any additions to or derivative works of the Software that are made available
+under this License.
+
+The terms “reproduce,” “reproduction,” “derivative works,” and “distribution” have the meaning as provided
+under U.S. copyright law; provided, however, that for the purposes of this License, derivative works shall
+not include works that remain separable from, or merely link (or bind by name) to the interfaces of, the Work.
+
+Works, including the Software, are “made available” under this License by including in or with the Work either
+(a) a copyright notice referencing the applicability of this License to the Work, or (b) a copy of this License.
+
+2. License Grants
+2.1 Copyright Grant. Subject to the terms and conditions of this License, each Licensor grants to you a perpetual,
+worldwide, non-exclusive, royalty-free, copyright license to reproduce, prepare derivative works of, publicly
+display, publicly perform, sublicense and distribute its Work and any resulting derivative works in any form.
+2.2 Patent Grant. Subject to the terms and conditions of this License, each Licensor grants to you a perpetual,
+worldwide, non-exclusive, royalty-free patent license to make, have made, use, sell, offer for sale, import,
+and otherwise transfer its Work, in whole or in part. The foregoing license applies only to the patent claims
+licensable by Licensor that would be infringed by Licensor’s Work (or portion thereof) individually and excluding
+any combinations with any other materials or technology.
+
+3. Limitations
+3.1 Redistribution. You may reproduce or distribute the Work only if (a) you do so under this License, (b) you include
+a complete copy of this License with your distribution, and (c) you retain without modification any copyright, patent,
+trademark, or attribution notices that are present in the Work.
+3.2 Derivative Works. You may specify that additional or different terms apply to the use, reproduction, and distribution
+of your derivative works of the Work (“Your Terms”) only if (a) Your Terms provide that the use limitation in Section 3.3
+applies to your derivative works, and (b) you identify the specific derivative works that are subject to Your Terms.
+Notwithstanding Your Terms, this License (including the redistribution requirements in Section 3.1) will continue to
+apply to the Work itself.
+3.3 Use Limitation. The Work and any derivative works thereof only may be used or intended for use with the web services,
+computing platforms or applications provided by Amazon.com, Inc. or its affiliates, including Amazon Web Services, Inc.
+3.4 Patent Claims. If you bring or threaten to bring a patent claim against any Licensor (including any claim,
+cross-claim or counterclaim in a lawsuit) to enforce any patents that you allege are infringed by any Work, then your
+rights under this License from such Licensor (including the grants in Sections 2.1 and 2.2) will terminate immediately.
+3.5 Trademarks. This License does not grant any rights to use any Licensor’s or its affiliates’ names, logos, or
+trademarks, except as necessary to reproduce the notices described in this License.
+3.6 Termination. If you violate any term of this License, then your rights under this License (including the grants
+in Sections 2.1 and 2.2) will terminate immediately.
+
+4. Disclaimer of Warranty.
+THE WORK IS PROVIDED “AS IS” WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING WARRANTIES
+OR CONDITIONS OF M ERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, TITLE OR NON-INFRINGEMENT. YOU BEAR THE RISK OF
+UNDERTAKING ANY ACTIVITIES UNDER THIS LICENSE. SOME STATES’ CONSUMER LAWS DO NOT ALLOW EXCLUSION OF AN IMPLIED WARRANTY,
+SO THIS DISCLAIMER MAY NOT APPLY TO YOU.
+
+5. Limitation of Liability.
+EXCEPT AS PROHIBITED BY APPLICABLE LAW, IN NO EVENT AND UNDER NO LEGAL THEORY, WHETHER IN TORT (INCLUDING NEGLIGENCE),
+CONTRACT, OR OTHERWISE SHALL ANY LICENSOR BE LIABLE TO YOU FOR DAMAGES, INCLUDING ANY DIRECT, INDIRECT, SPECIAL,
+INCIDENTAL, OR CONSEQUENTIAL DAMAGES ARISING OUT OF OR RELATED TO THIS LICENSE, THE USE OR INABILITY TO USE THE WORK
+(INCLUDING BUT NOT LIMITED TO LOSS OF GOODWILL, BUSINESS INTERRUPTION, LOST PROFITS OR DATA, COMPUTER FAILURE OR
+MALFUNCTION, OR ANY OTHER COMM ERCIAL DAMAGES OR LOSSES), EVEN IF THE LICENSOR HAS BEEN ADVISED OF THE POSSIBILITY
+OF SUCH DAMAGES.
+
+Effective Date – April 18, 2008 © 2008 Amazon.com, Inc. or its affiliates. All rights reserved.
+"""
+
+import argparse
+import importlib
+import io
+import json
+import os
+import sys
+import time
+import numpy as np
+import matplotlib
+import matplotlib.image
+from scipy.ndimage import uniform_filter
+
+FUNCTION_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'functions', 'find-sounds')
+sys.path.insert(0, FUNCTION_PATH)
+
+SAMPLE_RATE = 48000
+CLIP_LENGTH = 3
+# Min to max frequencies rendered, as in the Lambda
+FREQ_LIMIT = [1000, 4000]
+# Side of the square window SSIM statistics are computed over
+SSIM_WINDOW = 7
+
+
+def synthetic_corpus(count, seed=0):
+    """
+    Fixed set of clips covering the sounds the renderers have to agree on
+
+    Args:
+        count (int): Number of clips
+        seed (int, optional): Random seed. Defaults to 0.
+
+    Returns:
+        list[tuple(str, numpy.Array)]: Name and float32 samples of each clip
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(SAMPLE_RATE * CLIP_LENGTH) / SAMPLE_RATE
+    kinds = ['alarm', 'chirp', 'tone', 'noise', 'clicks', 'silence']
+    corpus = []
+    for index in range(count):
+        kind = kinds[index % len(kinds)]
+        if kind == 'alarm':
+            clip = 0.3 * np.sin(2 * np.pi * rng.uniform(2800, 3400) * t) * (np.sin(2 * np.pi * 2 * t) > 0)
+            clip += 0.02 * rng.standard_normal(len(t))
+        elif kind == 'chirp':
+            f0, f1 = rng.uniform(500, 1500), rng.uniform(3000, 6000)
+            clip = 0.2 * np.sin(2 * np.pi * (f0 * t + (f1 - f0) * t ** 2 / (2 * CLIP_LENGTH)))
+        elif kind == 'tone':
+            clip = sum(0.1 * np.sin(2 * np.pi * rng.uniform(1000, 4000) * t) for _ in range(3))
+        elif kind == 'noise':
+            clip = rng.uniform(0.01, 0.2) * rng.standard_normal(len(t))
+        elif kind == 'clicks':
+            clip = np.zeros(len(t))
+            clip[rng.integers(0, len(t), 40)] = rng.uniform(-1, 1, 40)
+        else:
+            clip = np.zeros(len(t))
+        corpus.append((f'{index:03d}-{kind}', clip.astype(np.float32)))
+    return corpus
+
+
+def load_function(spec):
+    """
+    Import a function named as module:function
+
+    Args:
+        spec (str): Module and function name, the module is looked up on sys.path
+
+    Returns:
+        function: The function
+    """
+    module_name, function_name = spec.split(':')
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def render(renderer, spect_type, clip):
+    """
+    Render one clip to PNG with a plot_spectrogram compatible function
+
+    Args:
+        renderer (function): Renderer with the plot_spectrogram signature
+        spect_type (str): Spectrogram type
+        clip (numpy.Array): Samples to render
+
+    Returns:
+        tuple(bytes, float): PNG contents and seconds taken
+    """
+    image_buffer = io.BytesIO()
+    start = time.perf_counter()
+    renderer(clip, SAMPLE_RATE, spect_type=spect_type, freq_range=FREQ_LIMIT, image_buffer=image_buffer)
+    return image_buffer.getvalue(), time.perf_counter() - start
+
+
+def decode_png(png):
+    """
+    Decode PNG contents to 8 bit RGBA
+
+    Args:
+        png (bytes): PNG file contents
+
+    Returns:
+        numpy.Array: (height, width, 4) uint8 image
+    """
+    image = matplotlib.image.imread(io.BytesIO(png), format='png')
+    if image.dtype != np.uint8:
+        image = np.round(image * 255).astype(np.uint8)
+    if image.shape[2] == 3:
+        image = np.dstack((image, np.full(image.shape[:2], 255, dtype=np.uint8)))
+    return image
+
+
+def ssim(reference, candidate):
+    """
+    Mean structural similarity of the luminance of two images
+
+    Args:
+        reference (numpy.Array): (height, width, 4) uint8 image
+        candidate (numpy.Array): (height, width, 4) uint8 image of the same shape
+
+    Returns:
+        float: 1.0 for identical images
+    """
+    weights = np.array([0.299, 0.587, 0.114])
+    x = reference[..., :3].astype(np.float64) @ weights
+    y = candidate[..., :3].astype(np.float64) @ weights
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+
+    mean_x, mean_y = uniform_filter(x, SSIM_WINDOW), uniform_filter(y, SSIM_WINDOW)
+    var_x = uniform_filter(x * x, SSIM_WINDOW) - mean_x ** 2
+    var_y = uniform_filter(y * y, SSIM_WINDOW) - mean_y ** 2
+    covariance = uniform_filter(x * y, SSIM_WINDOW) - mean_x * mean_y
+    score = ((2 * mean_x * mean_y + c1) * (2 * covariance + c2)) / \
+        ((mean_x ** 2 + mean_y ** 2 + c1) * (var_x + var_y + c2))
+    return float(score.mean())
+
+
+def brightness_classifier(png):
+    """
+    Local stand-in for the Custom Labels model
+
+    Scores the share of bright pixels in the image, which moves with the energy
+    the spectrogram shows in the alarm band, so it reacts to colour and
+    geometry changes the way a trained model would be expected to.
+
+    Args:
+        png (bytes): PNG file contents
+
+    Returns:
+        float: Confidence between 0 and 1
+    """
+    image = decode_png(png)[..., :3].astype(np.float32) / 255
+    return float((image.max(axis=2) > 0.5).mean())
+
+
+def compare(name, reference, candidate, classifier=None):
+    """
+    Parity metrics for one clip
+
+    Args:
+        name (str): Clip name
+        reference (tuple(bytes, float)): PNG and render time of the reference path
+        candidate (tuple(bytes, float)): PNG and render time of the candidate path
+        classifier (function, optional): Maps PNG contents to a confidence. Defaults to None, no scoring.
+
+    Returns:
+        dict: Metrics for the clip
+    """
+    reference_image, candidate_image = decode_png(reference[0]), decode_png(candidate[0])
+    result = {'clip': name,
+              'reference_bytes': len(reference[0]), 'candidate_bytes': len(candidate[0]),
+              'reference_s': reference[1], 'candidate_s': candidate[1],
+              'same_shape': reference_image.shape == candidate_image.shape}
+    if result['same_shape']:
+        diff = np.abs(reference_image.astype(np.int16) - candidate_image.astype(np.int16))
+        result['max_abs_diff'] = int(diff.max())
+        result['mean_abs_diff'] = float(diff.mean())
+        result['ssim'] = ssim(reference_image, candidate_image)
+    if classifier is not None:
+        result['reference_confidence'] = classifier(reference[0])
+        result['candidate_confidence'] = classifier(candidate[0])
+        result['confidence_diff'] = abs(result['reference_confidence'] - result['candidate_confidence'])
+    return result
+
+
+def failures(result, max_pixel_diff, min_ssim, max_confidence_diff):
+    """
+    Tolerances a clip's metrics fall outside of
+
+    Args:
+        result (dict): Metrics from compare
+        max_pixel_diff (int): Largest allowed difference of any pixel channel
+        min_ssim (float): Smallest allowed SSIM
+        max_confidence_diff (float): Largest allowed confidence difference
+
+    Returns:
+        list[str]: Description of each failed check
+    """
+    if not result['same_shape']:
+        return ['image size differs']
+    failed = []
+    if result['max_abs_diff'] > max_pixel_diff:
+        failed.append(f"max abs diff {result['max_abs_diff']} > {max_pixel_diff}")
+    if result['ssim'] < min_ssim:
+        failed.append(f"ssim {result['ssim']:.4f} < {min_ssim}")
+    if result.get('confidence_diff', 0) > max_confidence_diff:
+        failed.append(f"confidence diff {result['confidence_diff']:.4f} > {max_confidence_diff}")
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check an alternative spectrogram renderer against the reference images')
+    parser.add_argument('--reference', default='Mel', help='Spectrogram type of the reference path')
+    parser.add_argument('--candidate', help='Spectrogram type of the candidate path, defaults to the reference type')
+    parser.add_argument('--reference-function', default='spectrogram_plotter:plot_spectrogram',
+                        help='Reference renderer as module:function')
+    parser.add_argument('--candidate-function', default='spectrogram_plotter:plot_spectrogram',
+                        help='Candidate renderer as module:function, with the plot_spectrogram signature')
+    parser.add_argument('--clips', type=int, default=12, help='Clips in the synthetic corpus')
+    parser.add_argument('--classifier', default='builtin',
+                        help='Confidence stand-in as module:function taking PNG bytes, builtin, or none')
+    parser.add_argument('--max-pixel-diff', type=int, default=0, help='Largest allowed pixel channel difference')
+    parser.add_argument('--min-ssim', type=float, default=0.99)
+    parser.add_argument('--max-confidence-diff', type=float, default=0.01)
+    parser.add_argument('--json', help='Write the results to this file')
+    args = parser.parse_args()
+
+    matplotlib.use('Agg')
+    reference_renderer = load_function(args.reference_function)
+    candidate_renderer = load_function(args.candidate_function)
+    candidate_type = args.candidate or args.reference
+    classifier = {'builtin': brightness_classifier, 'none': None}.get(args.classifier)
+    if classifier is None and args.classifier != 'none':
+        classifier = load_function(args.classifier)
+
+    results = []
+    failed_clips = 0
+    print(f"{'clip':14s} {'max diff':>8s} {'ssim':>7s} {'conf diff':>9s} {'ref KB':>7s} {'cand KB':>7s} "
+          f"{'ref s':>6s} {'cand s':>6s}")
+    for name, clip in synthetic_corpus(args.clips):
+        result = compare(name, render(reference_renderer, args.reference, clip),
+                         render(candidate_renderer, candidate_type, clip), classifier)
+        result['failures'] = failures(result, args.max_pixel_diff, args.min_ssim, args.max_confidence_diff)
+        failed_clips += bool(result['failures'])
+        results.append(result)
+        print(f"{name:14s} {result.get('max_abs_diff', -1):8d} {result.get('ssim', 0):7.4f} "
+              f"{result.get('confidence_diff', 0):9.4f} {result['reference_bytes'] / 1024:7.1f} "
+              f"{result['candidate_bytes'] / 1024:7.1f} {result['reference_s']:6.3f} {result['candidate_s']:6.3f}"
+              f"{'  FAIL: ' + ', '.join(result['failures']) if result['failures'] else ''}")
+
+    reference_s = sum(result['reference_s'] for result in results)
+    candidate_s = sum(result['candidate_s'] for result in results)
+    print(f'{len(results) - failed_clips}/{len(results)} clips within tolerance, '
+          f'render time {reference_s:.2f} s -> {candidate_s:.2f} s ({reference_s / candidate_s:.2f}x)')
+
+    if args.json:
+        with open(args.json, 'w') as out:
+            json.dump({'reference': [args.reference_function, args.reference],
+                       'candidate': [args.candidate_function, candidate_type],
+                       'clips': results}, out, indent=2)
+    sys.exit(1 if failed_clips else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -63,17 +63,34 @@ Effective Date – April 18, 2008 © 2008 Amazon.com, Inc. or its affiliates. Al
 """
 
 import librosa as libr
+import numpy as np
+import soundfile as sf
+import soxr
 from urllib.parse import unquote_plus
 import os
 import io
+import gc
+import itertools
+import time
 import datetime
-import boto3
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from aws_lambda_powertools import Tracer
 from spectrogram_plotter import plot_spectrogram
-from rekognition_wrapper import show_custom_labels
+from band_limited import band_rate, BAND_LIMITED_TYPES
+from rekognition_wrapper import classify_with_models, get_models
 from sns_wrapper import publish_message
+from sharding import plan_shards, merge_timelines, run_shards, SHARD_WORKERS, SHARD_DURATION
+from timeline_store import save_timeline, is_timeline_key, SAVE_TIMELINE
+from idempotency import get_idempotency_store, idempotency_key, in_progress_expiry
+from aws_clients import get_client
+from profiling import profile_invocation, is_profile_key
+from render_pool import fork_map, RENDER_WORKERS
+from checkpoint import get_checkpoint_store, is_checkpoint_key, request_continuation, Deadline
 
 tracer = Tracer()
+idempotency_store = get_idempotency_store()
+checkpoint_store = get_checkpoint_store()
 
 # Value must be between 0 and 1.  0 <= value < 1
 OVERLAP = float(os.getenv("SAMPLE_OVERLAP", '0.25'))
@@ -83,71 +100,220 @@ CLIP_LENGTH = int(os.getenv("SAMPLE_LENGTH", '3'))
 MIN_CONFIDENCE = float(os.getenv("MIN_CONFIDENCE", '0.90'))
 # (Probable) S3 Bucket name
 S3_BUCKET = os.getenv("AUDIO_BUCKET")
+# Decode and window the audio incrementally to reduce peak memory
+LOW_MEMORY = os.getenv("LOW_MEMORY", 'false').lower() == 'true'
+# Garbage collector generation collected after every clip in low memory mode, -1 for none.
+# Each figure leaves reference cycles behind, and collecting the young generations frees
+# them at a fraction of the cost of a full collection
+GC_GENERATION = int(os.getenv("GC_GENERATION", '1'))
 
 # Min to max frequencies to plot spectrogram
 FREQ_LIMIT = [1000, 4000]
-# Samples per second
-SAMPLE_RATE = 48000
+# Spectrogram type the model was trained on
+SPECTROGRAM_TYPE = os.getenv("SPECTROGRAM_TYPE", 'Mel')
+# Samples per second, band limited types decimate the audio as it is loaded
+SAMPLE_RATE = band_rate(FREQ_LIMIT) if SPECTROGRAM_TYPE in BAND_LIMITED_TYPES else 48000
 # length of sample in terms of samples
 SAMPLE_LEN = SAMPLE_RATE * CLIP_LENGTH
 # How much to advance when sampling for tne next clip
 CLIP_OFFSET = int(SAMPLE_LEN*(1.0-OVERLAP))
 # Resample the audio to mono
 IS_MONO = True
+# Frames decoded at a time in low memory mode
+STREAM_BLOCK_LEN = 65536
+# Whole seconds decoded either side of a partial load and dropped, so the
+# resampler's edge transient does not reach the first or last window
+RESAMPLE_MARGIN = 1
+# Rekognition models every clip is classified with
+MODELS = get_models(default_min_confidence=MIN_CONFIDENCE)
+# Size of each ranged GET when downloading the audio object
+DOWNLOAD_PART_SIZE = int(os.getenv("DOWNLOAD_PART_SIZE", str(8 * 1024 * 1024)))
+# Ranged GETs in flight at once
+DOWNLOAD_CONCURRENCY = int(os.getenv("DOWNLOAD_CONCURRENCY", '16'))
+# Bytes copied from a response body at a time
+DOWNLOAD_READ_SIZE = 1024 * 1024
+
+download_executor = ThreadPoolExecutor(max_workers=DOWNLOAD_CONCURRENCY)
+
+
+def window_count(num_samples):
+    """
+    Number of windows needed to cover the audio
+
+    Windows start every CLIP_OFFSET samples. A window is only added while the
+    previous one stops short of the end, so the file ends inside the last window.
 
+    Args:
+        num_samples (int): Length of the audio in samples
 
-def build_clipset(raw_audio):
+    Returns:
+        int: Number of windows, at least one
+    """
+    return 1 + -(-max(num_samples - SAMPLE_LEN, 0) // CLIP_OFFSET)
+
+
+def build_clipset(raw_audio, start=0, end=None):
     """
     Raw S3 data is resampled to the target rate and converted to 
     mono audio if in stereo
 
+    The windows are returned as a strided view of the audio, one row per window
+    starting at index * CLIP_OFFSET. When the audio does not end on a window
+    boundary it is zero-padded to complete the final window, so every window
+    has the same length and time scale. A partial load decodes RESAMPLE_MARGIN
+    seconds either side of the requested samples and drops them, so its windows
+    match the same windows of a load of the whole file.
+
     Args:
         raw_audio (numpy.Array): full resampled audio data
+        start (int, optional): First sample to load. Defaults to 0.
+        end (int, optional): Sample to stop loading at. Defaults to None, the end of the file.
 
     Returns:
-        Array[numpy.Array]: The full set of clips to be tested
+        numpy.Array: (windows, SAMPLE_LEN) array of the clips to be tested
+    """
+    preroll = min(start, RESAMPLE_MARGIN * SAMPLE_RATE)
+    duration = None if end is None else (end - start + preroll) / SAMPLE_RATE + RESAMPLE_MARGIN
+    sample_data, native_rate = libr.load(raw_audio, sr=None, mono=IS_MONO,
+                                         offset=(start - preroll) / SAMPLE_RATE, duration=duration)
+    if native_rate != SAMPLE_RATE:
+        # the same resampler as libr.load, which can round the length up by a sample
+        # and so add a window that stream_clipset and the shard plan do not have
+        sample_data = soxr.resample(sample_data, native_rate, SAMPLE_RATE, 'HQ')
+    sample_data = sample_data[preroll:] if end is None else sample_data[preroll:preroll + end - start]
+
+    num_windows = window_count(len(sample_data))
+    padded_len = (num_windows - 1) * CLIP_OFFSET + SAMPLE_LEN
+    if len(sample_data) < padded_len:
+        padded = np.zeros(padded_len, dtype=sample_data.dtype)
+        padded[:len(sample_data)] = sample_data
+        sample_data = padded
+
+    return np.lib.stride_tricks.sliding_window_view(sample_data, SAMPLE_LEN)[::CLIP_OFFSET]
+
+
+def stream_clipset(raw_audio):
     """
-    sample_data, _ = libr.load(raw_audio, sr=SAMPLE_RATE, mono=IS_MONO)
+    Low memory version of build_clipset
 
-    clip_len = sample_data.shape[0]
-    clip_position = 0
+    The audio is decoded, mixed to mono and resampled one block at a time into a
+    float32 buffer holding a single window, so the full decoded file is never
+    held in memory. Each clip is a view into that buffer and is only valid until
+    the next clip is requested.
 
-    clipset = []
+    Args:
+        raw_audio (io.BytesIO): Audio file contents
 
-    if clip_len < SAMPLE_LEN:
-        clipset.append(sample_data)
-    else:
-        while clip_position < clip_len:
-            window_sample = sample_data[clip_position: min(clip_position+SAMPLE_LEN, clip_len)]
-            clipset.append(window_sample)
-            clip_position = clip_position + CLIP_OFFSET
+    Yields:
+        numpy.Array: The clips to be tested, matching the rows of build_clipset
+    """
+    buffer = np.empty(SAMPLE_LEN + 2 * STREAM_BLOCK_LEN, dtype=np.float32)
+    filled = 0
+    emitted = 0
+
+    with sf.SoundFile(raw_audio) as audio:
+        resampler = None
+        if audio.samplerate != SAMPLE_RATE:
+            resampler = soxr.ResampleStream(audio.samplerate, SAMPLE_RATE, 1, dtype='float32', quality='HQ')
+
+        blocks = audio.blocks(blocksize=STREAM_BLOCK_LEN, dtype='float32', always_2d=True)
+        for block in blocks:
+            samples = block.mean(axis=1, dtype=np.float32) if IS_MONO else block[:, 0]
+            del block
+            if resampler is not None:
+                samples = resampler.resample_chunk(samples)
+
+            # grow the buffer if the resampler returns more than expected
+            if filled + len(samples) > len(buffer):
+                buffer = np.concatenate((buffer[:filled], np.empty(len(samples), dtype=np.float32)))
+            buffer[filled:filled + len(samples)] = samples
+            filled += len(samples)
+
+            while filled >= SAMPLE_LEN:
+                yield buffer[:SAMPLE_LEN]
+                emitted += 1
+                # slide the buffer forward by one clip offset
+                buffer[:filled - CLIP_OFFSET] = buffer[CLIP_OFFSET:filled]
+                filled -= CLIP_OFFSET
+
+        if resampler is not None:
+            samples = resampler.resample_chunk(np.empty(0, dtype=np.float32), last=True)
+            if filled + len(samples) > len(buffer):
+                buffer = np.concatenate((buffer[:filled], np.empty(len(samples), dtype=np.float32)))
+            buffer[filled:filled + len(samples)] = samples
+            filled += len(samples)
+
+    # final window, zero-padded, unless the previous window already reaches the end of the file
+    if emitted == 0 or filled > SAMPLE_LEN - CLIP_OFFSET:
+        buffer[filled:SAMPLE_LEN] = 0
+        yield buffer[:SAMPLE_LEN]
+
+
+def read_body_into(body, buffer, position):
+    """
+    Copy an S3 response body into a slice of a preallocated buffer
 
-    return clipset
+    Args:
+        body (botocore.response.StreamingBody): Response body
+        buffer (memoryview): Buffer holding the whole object
+        position (int): Offset of the body within the object
+    """
+    while True:
+        chunk = body.read(DOWNLOAD_READ_SIZE)
+        if not chunk:
+            break
+        buffer[position:position + len(chunk)] = chunk
+        position += len(chunk)
 
 
-def download_to_memory_file_object(bucketname, key):
+def download_to_memory_file_object(bucketname, key, client=None):
     """
     Load S3 audio object into memory (retaining the file structure)
 
+    The first ranged GET returns the object size, the buffer is allocated once at
+    that size and the remaining parts are fetched concurrently straight into it.
+    All parts are pinned to the ETag of the first response.
+
     Args:
         bucketname (str): S3 bucket name
         key (str): S3 object key
+        client (botocore.client.S3, optional): S3 client. Defaults to None, the shared client.
 
     Returns:
         io.BytesIO: Memory structure containing file contents
     """
-    # download from S3 to memory
-    session = boto3.Session()
-    session_s3 = session.resource('s3')
-    my_bucket = session_s3.Bucket(bucketname)
-    s3_object = my_bucket.Object(key)
+    s3_client = client if client is not None else get_client('s3')
+    start_time = time.perf_counter()
+
+    first = s3_client.get_object(Bucket=bucketname, Key=key, Range=f'bytes=0-{DOWNLOAD_PART_SIZE - 1}')
+    size = int(first['ContentRange'].split('/')[-1])
+    etag = first['ETag']
+
+    # grow the buffer to the object size in a single allocation
     byte_data = io.BytesIO()
-    s3_object.download_fileobj(byte_data)
+    byte_data.seek(size - 1)
+    byte_data.write(b'\0')
+    buffer = byte_data.getbuffer()
+
+    def download_part(position):
+        part_range = f'bytes={position}-{min(position + DOWNLOAD_PART_SIZE, size) - 1}'
+        response = s3_client.get_object(Bucket=bucketname, Key=key, Range=part_range, IfMatch=etag)
+        read_body_into(response['Body'], buffer, position)
+
+    try:
+        parts = download_executor.map(download_part, range(DOWNLOAD_PART_SIZE, size, DOWNLOAD_PART_SIZE))
+        read_body_into(first['Body'], buffer, 0)
+        list(parts)
+    finally:
+        buffer.release()
+
+    elapsed = time.perf_counter() - start_time
+    print(f'Downloaded {size / 1e6:.1f} MB from {key} in {elapsed:.2f} s ({size / 1e6 / elapsed:.1f} MB/s)')
     byte_data.seek(0)
     return byte_data
 
 
-def send_event(confidence, time_delta_start, time_delta_end, file):
+def send_event(confidence, time_delta_start, time_delta_end, file, model):
     """
     For detected alarms, send a message through SNS to subscrivers
 
@@ -158,16 +324,143 @@ def send_event(confidence, time_delta_start, time_delta_end, file):
         time_delta_start (time.timedelta): Time from start of clip to the start of the clip (including ms) that has the alarm
         time_delta_end ([type]): Time from start of clip to the end of the clip (including ms) that has the alarm
         file (str): S3 object key for audio file that conained alarm
+        model (dictionary): Model that detected the sound
     """
     attributes = {'Confidence': f'{confidence:.2f}',
                   'Start_Time': str(time_delta_start),
-                  'End_Time': str(time_delta_end)}
-    message = f'Found alarm in {file}\n{attributes}'
+                  'End_Time': str(time_delta_end),
+                  'Model': model['name']}
+    message = f"Found {model['label']} in {file}\n{attributes}"
 
     publish_message(message, attributes)
 
 
-def check_audio_for_event(bucketname, key):
+def render_clip(clip):
+    """
+    Render a clip as a spectrogram
+
+    Args:
+        clip (numpy.Array): Samples of the clip
+
+    Returns:
+        bytes: PNG image
+    """
+    image_buffer = io.BytesIO()
+    plot_spectrogram(clip, SAMPLE_RATE, spect_type=SPECTROGRAM_TYPE, freq_range=FREQ_LIMIT, image_buffer=image_buffer)
+    if LOW_MEMORY and GC_GENERATION >= 0:
+        # free the figure's reference cycles in the process that drew it
+        gc.collect(GC_GENERATION)
+    return image_buffer.getvalue()
+
+
+def classify_clipset(clipset, start=0, workers=RENDER_WORKERS):
+    """
+    Render each clip as a spectrogram once and classify it with every model in MODELS
+
+    With RENDER_WORKERS above 1 the clips are rendered by forked worker processes,
+    which keep rendering the next clips while the current one is classified.
+
+    Args:
+        clipset (numpy.Array): Clips produced by build_clipset or stream_clipset
+        start (int, optional): Absolute sample position of the first clip. Defaults to 0.
+        workers (int, optional): Render processes. Defaults to RENDER_WORKERS.
+
+    Yields:
+        tuple(float, tuple(float)): Offset in seconds from the start of the file and the
+            confidence of each model
+    """
+    for index, image in enumerate(fork_map(render_clip, clipset, workers)):
+        image_buffer = io.BytesIO(image)
+        confidences = classify_with_models(image_buffer, MODELS)
+
+        offset = (start + index * CLIP_OFFSET) / SAMPLE_RATE
+        yield offset, confidences
+
+
+def render_settings(model):
+    """
+    Settings that determine the confidences in a timeline
+
+    Args:
+        model (dictionary): Model that produced the confidences
+
+    Returns:
+        dict: Model ARN and render settings
+    """
+    return {'model_arn': model['arn'],
+            'label': model['label'],
+            'spect_type': SPECTROGRAM_TYPE,
+            'freq_range': FREQ_LIMIT,
+            'sample_rate': SAMPLE_RATE,
+            'clip_length': CLIP_LENGTH,
+            'overlap': OVERLAP}
+
+
+def report_event(index, offset, confidences, key):
+    """
+    Send a notification for every model whose confidence passes its threshold
+
+    Args:
+        index (int): Position of the clip in the timeline
+        offset (float): Offset in seconds from the start of the file
+        confidences (tuple(float)): Rekognition generated confidence of each model for the clip
+        key (str): S3 object key for the audio file
+    """
+    for model, confidence in zip(MODELS, confidences):
+        if confidence >= model['min_confidence']:
+            time_delta_start = datetime.timedelta(milliseconds=offset*1000)
+            time_delta_end = datetime.timedelta(milliseconds=(offset+CLIP_LENGTH)*1000)
+            print(f"Sending a message for index: {index} model: {model['name']}")
+            send_event(confidence, time_delta_start, time_delta_end, key, model)
+
+
+def process_shard(audio_path, start, owned_end, end):
+    """
+    Classify the windows owned by a single shard of a long recording
+
+    Args:
+        audio_path (str): Local path of the audio file
+        start (int): First sample of the shard
+        owned_end (int): Windows starting at or after this sample belong to the next shard
+        end (int): Last sample of the shard audio, including the overlap
+
+    Returns:
+        list[tuple(float, tuple(float))]: (offset, confidences) pairs for the owned windows
+    """
+    clipset = build_clipset(audio_path, start=start, end=end)
+    owned = clipset[:-(-(owned_end - start) // CLIP_OFFSET)]
+    # shards already run in parallel processes
+    return list(classify_clipset(owned, start=start, workers=1))
+
+
+def check_sharded_audio_for_event(data, key):
+    """
+    Split a long recording into time-range shards and classify them in parallel
+
+    The shards are written to a local file so that each worker only decodes its
+    own time range, and the per-shard timelines are merged back into one.
+
+    Args:
+        data (io.BytesIO): Audio file contents
+        key (str): S3 object key
+
+    Returns:
+        list[tuple(float, tuple(float))]: (offset, confidences) pairs ordered by offset
+    """
+    suffix = os.path.splitext(key)[1]
+    with tempfile.NamedTemporaryFile(suffix=suffix) as audio_file:
+        audio_file.write(data.getbuffer())
+        audio_file.flush()
+
+        total_samples = int(libr.get_duration(path=audio_file.name) * SAMPLE_RATE)
+        shards = plan_shards(total_samples, SHARD_DURATION * SAMPLE_RATE, SAMPLE_LEN, CLIP_OFFSET)
+        print(f'Processing {key} as {len(shards)} shards')
+        shard_timelines = run_shards(process_shard, [(audio_file.name, *shard) for shard in shards])
+
+    return merge_timelines(shard_timelines)
+
+
+def check_audio_for_event(bucketname, key, work_key=None, deadline=None):
     """
     Main controller for alarm detection:
       Downloads file from S3
@@ -176,36 +469,76 @@ def check_audio_for_event(bucketname, key):
       Use rekognition to classify
       Send notification if clip contains alarm sound with 
         confidence > MIN_CONFIDENCE
+      Store the confidence of every clip as a timeline next to the file
+
+    Files longer than SHARD_DURATION are split into shards and processed by
+    SHARD_WORKERS parallel workers when more than one worker is configured.
+    With LOW_MEMORY set the audio is decoded incrementally by stream_clipset.
+
+    With a checkpoint store and a deadline, processing stops once the next window
+    might not finish in the time left. The windows processed so far are saved as a
+    checkpoint under work_key and the next call for the same work resumes from it.
+    Sharded files are processed as a whole and never checkpointed.
 
     Args:
         bucketname (str): S3 bucket name
         key (str): S3 object key
+        work_key (str, optional): Idempotency key the checkpoint is stored under. Defaults to None.
+        deadline (Deadline, optional): Time left in the invocation. Defaults to None, no time limit.
+
+    Returns:
+        bool: True if the file was finished, False if it stopped at the deadline
     """
     # download the file
     data = download_to_memory_file_object(bucketname, key)
 
-    # build clip set
-    clipset = build_clipset(data)
-
-    # convert to spectrogram
-    index = 0
-    for clip in clipset:
-        image_buffer = io.BytesIO()
-        plot_spectrogram(clip, SAMPLE_RATE, spect_type='Mel', freq_range=FREQ_LIMIT, image_buffer=image_buffer)
-
-        labels = show_custom_labels(image_buff=image_buffer, min_conf=0)
-
-        label = next(item for item in labels if item['Name'] == 'alarm')
-        confidence = float(label['Confidence']) / 100
-
-        offset = (index * CLIP_OFFSET) / SAMPLE_RATE
-        time_delta_start = datetime.timedelta(milliseconds=offset*1000)
-        time_delta_end = datetime.timedelta(milliseconds=(offset+CLIP_LENGTH)*1000)
-
-        if confidence >= MIN_CONFIDENCE:
-            print(f'Sending a message for index: {index}')
-            send_event(confidence, time_delta_start, time_delta_end, key)
-        index += 1
+    checkpoint = None
+    if checkpoint_store is not None and work_key is not None:
+        checkpoint = checkpoint_store.load(bucketname, key, work_key)
+    first_window, results = checkpoint or (0, [])
+    # unknown until the end when the audio is streamed
+    num_windows = None
+    if checkpoint is not None:
+        print(f'Resuming {key} at window {first_window}')
+    checkpointing = deadline is not None and checkpoint_store is not None and work_key is not None
+
+    if first_window == 0 and SHARD_WORKERS > 1 and libr.get_duration(path=data) > SHARD_DURATION:
+        data.seek(0)
+        # every window is already classified when the shards return, so there is nothing to checkpoint
+        timeline = check_sharded_audio_for_event(data, key)
+        checkpointing = False
+    else:
+        data.seek(0)
+        # build clip set
+        if LOW_MEMORY:
+            clipset = itertools.islice(stream_clipset(data), first_window, None)
+        else:
+            clipset = build_clipset(data, start=first_window * CLIP_OFFSET)
+            num_windows = first_window + len(clipset)
+        timeline = classify_clipset(clipset, start=first_window * CLIP_OFFSET)
+
+    window_start = time.perf_counter()
+    for index, (offset, confidences) in enumerate(timeline, first_window):
+        report_event(index, offset, confidences, key)
+        results.append((offset, confidences))
+
+        if checkpointing:
+            deadline.record(time.perf_counter() - window_start)
+            if deadline.expired() and index + 1 != num_windows:
+                checkpoint_store.save(bucketname, key, work_key, index + 1, results)
+                print(f'Stopping {key} at window {index + 1} with {deadline.remaining():.1f} s left')
+                return False
+            window_start = time.perf_counter()
+
+    if SAVE_TIMELINE:
+        for position, model in enumerate(MODELS):
+            model_timeline = [(offset, confidences[position]) for offset, confidences in results]
+            model_name = model['name'] if len(MODELS) > 1 else None
+            save_timeline(bucketname, key, model_timeline, render_settings(model), model_name=model_name)
+
+    if checkpoint is not None:
+        checkpoint_store.delete(bucketname, key, work_key)
+    return True
 
 
 @tracer.capture_lambda_handler
@@ -213,15 +546,71 @@ def lambda_handler(event, context):
     """
     Lambda kicked off by S3 object upload
 
+    Deliveries of an object that has already been processed (or is being
+    processed) with the same content and model are skipped before download.
+
+    When checkpoints are enabled, work that would not finish before the
+    invocation times out is checkpointed and handed to a new invocation of
+    this function, along with the records not yet started.
+
     Args:
         event (dictionary): S3 event information
         context (dictionary): Lambda execution context
+
+    Returns:
+        dictionary: Number of records processed, skipped and continued
     """
-    for record in event['Records']:
+    processed = 0
+    skipped = 0
+    continued = 0
+    deadline = Deadline(context) if context is not None and checkpoint_store is not None else None
+    records = event['Records']
+    for position, record in enumerate(records):
         bucket = record['s3']['bucket']['name']
         key = unquote_plus(record['s3']['object']['key'])
+        if is_timeline_key(key) or is_profile_key(key) or is_checkpoint_key(key):
+            continue
+
+        if deadline is not None and deadline.expired():
+            request_continuation({'Records': records[position:]}, context)
+            continued = len(records) - position
+            print(f'Handed {continued} records to a new invocation')
+            break
+
+        # a continuation already holds the claim on its first record and extends it to its own timeout
+        work_key = idempotency_key(record, ','.join(model['arn'] or '' for model in MODELS))
+        claimed = record.get('continuation', False)
+        if idempotency_store is not None:
+            if claimed:
+                idempotency_store.renew(work_key, in_progress_expiry(context))
+            elif not idempotency_store.begin(work_key, in_progress_expiry(context)):
+                print(f'Skipping duplicate delivery of {key} in bucket {bucket}')
+                skipped += 1
+                continue
+
         print(f'Checking file {key} in bucket {bucket} for audio event')
-        check_audio_for_event(bucket, key)
+        try:
+            with profile_invocation(bucket, key):
+                finished = check_audio_for_event(bucket, key, work_key, deadline)
+            if not finished:
+                # held until the continuation starts and extends it, however long it is queued
+                if idempotency_store is not None:
+                    idempotency_store.renew(work_key)
+                request_continuation({'Records': [dict(record, continuation=True)] + records[position + 1:]}, context)
+        except Exception:
+            if idempotency_store is not None:
+                idempotency_store.release(work_key)
+            raise
+        if not finished:
+            continued = len(records) - position
+            print(f'Handed {key} and {continued - 1} more records to a new invocation')
+            break
+        if idempotency_store is not None:
+            idempotency_store.complete(work_key)
+        processed += 1
+
+    print(f'Processed {processed} files, skipped {skipped} duplicate deliveries')
+    return {'processed': processed, 'skipped': skipped, 'continued': continued}
 
 
 if __name__ == "__main__":
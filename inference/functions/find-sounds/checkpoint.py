@@ -0,0 +1,299 @@
+"""
+Amazon Software License
+
+1. Definitions
+“Licensor” means any person or entity that distributes its Work.
+
+“Software” means the original work of authorship made available under this License.
+
+“Work” means the Software and any additions to or derivative works of the Software that are made available
+under this License.
+
+The terms “reproduce,” “reproduction,” “derivative works,” and “distribution” have the meaning as provided
+under U.S. copyright law; provided, however, that for the purposes of this License, derivative works shall
+not include works that remain separable from, or merely link (or bind by name) to the interfaces of, the Work.
+
+Works, including the Software, are “made available” under this License by including in or with the Work either
+(a) a copyright notice referencing the applicability of this License to the Work, or (b) a copy of this License.
+
+2. License Grants
+2.1 Copyright Grant. Subject to the terms and conditions of this License, each Licensor grants to you a perpetual,
+worldwide, non-exclusive, royalty-free, copyright license to reproduce, prepare derivative works of, publicly
+display, publicly perform, sublicense and distribute its Work and any resulting derivative works in any form.
+2.2 Patent Grant. Subject to the terms and conditions of this License, each Licensor grants to you a perpetual,
+worldwide, non-exclusive, royalty-free patent license to make, have made, use, sell, offer for sale, import,
+and otherwise transfer its Work, in whole or in part. The foregoing license applies only to the patent claims
+licensable by Licensor that would be infringed by Licensor’s Work (or portion thereof) individually and excluding
+any combinations with any other materials or technology.
+
+3. Limitations
+3.1 Redistribution. You may reproduce or distribute the Work only if (a) you do so under this License, (b) you include
+a complete copy of this License with your distribution, and (c) you retain without modification any copyright, patent,
+trademark, or attribution notices that are present in the Work.
+3.2 Derivative Works. You may specify that additional or different terms apply to the use, reproduction, and distribution
+of your derivative works of the Work (“Your Terms”) only if (a) Your Terms provide that the use limitation in Section 3.3
+applies to your derivative works, and (b) you identify the specific derivative works that are subject to Your Terms.
+Notwithstanding Your Terms, this License (including the redistribution requirements in Section 3.1) will continue to
+apply to the Work itself.
+3.3 Use Limitation. The Work and any derivative works thereof only may be used or intended for use with the web services,
+computing platforms or applications provided by Amazon.com, Inc. or its affiliates, including Amazon Web Services, Inc.
+3.4 Patent Claims. If you bring or threaten to bring a patent claim against any Licensor (including any claim,
+cross-claim or counterclaim in a lawsuit) to enforce any patents that you allege are infringed by any Work, then your
+rights under this License from such Licensor (including the grants in Sections 2.1 and 2.2) will terminate immediately.
+3.5 Trademarks. This License does not grant any rights to use any Licensor’s or its affiliates’ names, logos, or
+trademarks, except as necessary to reproduce the notices described in this License.
+3.6 Termination. If you violate any term of this License, then your rights under this License (including the grants
+in Sections 2.1 and 2.2) will terminate immediately.
+
+4. Disclaimer of Warranty.
+THE WORK IS PROVIDED “AS IS” WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING WARRANTIES
+OR CONDITIONS OF M ERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, TITLE OR NON-INFRINGEMENT. YOU BEAR THE RISK OF
+UNDERTAKING ANY ACTIVITIES UNDER THIS LICENSE. SOME STATES’ CONSUMER LAWS DO NOT ALLOW EXCLUSION OF AN IMPLIED WARRANTY,
+SO THIS DISCLAIMER MAY NOT APPLY TO YOU.
+
+5. Limitation of Liability.
+EXCEPT AS PROHIBITED BY APPLICABLE LAW, IN NO EVENT AND UNDER NO LEGAL THEORY, WHETHER IN TORT (INCLUDING NEGLIGENCE),
+CONTRACT, OR OTHERWISE SHALL ANY LICENSOR BE LIABLE TO YOU FOR DAMAGES, INCLUDING ANY DIRECT, INDIRECT, SPECIAL,
+INCIDENTAL, OR CONSEQUENTIAL DAMAGES ARISING OUT OF OR RELATED TO THIS LICENSE, THE USE OR INABILITY TO USE THE WORK
+(INCLUDING BUT NOT LIMITED TO LOSS OF GOODWILL, BUSINESS INTERRUPTION, LOST PROFITS OR DATA, COMPUTER FAILURE OR
+MALFUNCTION, OR ANY OTHER COMM ERCIAL DAMAGES OR LOSSES), EVEN IF THE LICENSOR HAS BEEN ADVISED OF THE POSSIBILITY
+OF SUCH DAMAGES.
+
+Effective Date – April 18, 2008 © 2008 Amazon.com, Inc. or its affiliates. All rights reserved.
+"""
+
+import io
+import json
+import os
+import sqlite3
+import numpy as np
+from botocore.exceptions import ClientError
+from aws_clients import get_client
+
+# Store checkpoints of unfinished files next to the audio in S3 (deployed stack)
+CHECKPOINT = os.getenv("CHECKPOINT", 'false').lower() == 'true'
+# Local SQLite file holding checkpoints (testing and local runs)
+CHECKPOINT_DB = os.getenv("CHECKPOINT_DB")
+# Seconds kept in reserve to save the checkpoint and hand off to a new invocation
+DEADLINE_MARGIN = float(os.getenv("DEADLINE_MARGIN", '30'))
+# Weight of the latest window in the running estimate of the time per window
+WINDOW_TIME_SMOOTHING = 0.3
+# Appended to the audio object key to name its checkpoint
+CHECKPOINT_SUFFIX = '.checkpoint.npz'
+
+
+def is_checkpoint_key(key):
+    """
+    Check if an S3 object key names a checkpoint rather than an audio file
+
+    Args:
+        key (str): S3 object key
+
+    Returns:
+        bool: True for checkpoint objects
+    """
+    return key.endswith(CHECKPOINT_SUFFIX)
+
+
+class Deadline:
+    """
+    Tracks the time left in an invocation against the time taken per window
+    """
+
+    def __init__(self, context, margin=DEADLINE_MARGIN):
+        self.context = context
+        self.margin = margin
+        self.window_time = 0.0
+
+    def remaining(self):
+        """
+        Returns:
+            float: Seconds left before the invocation times out
+        """
+        return self.context.get_remaining_time_in_millis() / 1000
+
+    def record(self, seconds):
+        """
+        Update the time per window estimate, leaning towards slow windows
+
+        Args:
+            seconds (float): Time taken by the last window
+        """
+        smoothed = self.window_time + WINDOW_TIME_SMOOTHING * (seconds - self.window_time)
+        self.window_time = max(smoothed, seconds) if self.window_time else seconds
+
+    def expired(self):
+        """
+        Returns:
+            bool: True if another window might not finish with the margin still left
+        """
+        return self.remaining() < self.margin + 2 * self.window_time
+
+
+def checkpoint_to_bytes(work_key, next_window, results):
+    """
+    Pack the progress on a file into a .npz structure
+
+    Args:
+        work_key (str): Idempotency key of the work
+        next_window (int): Index of the first window still to be processed
+        results (list[tuple(float, tuple(float))]): (offset, confidences) pairs of the processed windows
+
+    Returns:
+        bytes: .npz file contents
+    """
+    byte_data = io.BytesIO()
+    np.savez_compressed(byte_data, work_key=np.asarray(work_key), next_window=np.asarray(next_window),
+                        offsets=np.array([offset for offset, _ in results], dtype=np.float64),
+                        confidences=np.array([confidences for _, confidences in results], dtype=np.float64))
+    return byte_data.getvalue()
+
+
+def checkpoint_from_bytes(work_key, contents):
+    """
+    Unpack progress written by checkpoint_to_bytes
+
+    Args:
+        work_key (str): Idempotency key of the work being resumed
+        contents (bytes): .npz file contents
+
+    Returns:
+        tuple(int, list[tuple(float, tuple(float))]): next window and results, None if the
+            checkpoint belongs to other content or models
+    """
+    with np.load(io.BytesIO(contents)) as data:
+        if data['work_key'].item() != work_key:
+            return None
+        results = [(float(offset), tuple(float(value) for value in confidences))
+                   for offset, confidences in zip(data['offsets'], data['confidences'])]
+        return int(data['next_window']), results
+
+
+class SQLiteCheckpointStore:
+    """
+    Checkpoints kept in a local SQLite file
+    """
+
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS checkpoints (id TEXT PRIMARY KEY, data BLOB NOT NULL)')
+
+    def load(self, bucketname, key, work_key):
+        """
+        Read the progress on a file
+
+        Args:
+            bucketname (str): S3 bucket name
+            key (str): S3 object key of the audio file
+            work_key (str): Idempotency key of the work
+
+        Returns:
+            tuple(int, list[tuple(float, tuple(float))]): next window and results, None without a checkpoint
+        """
+        row = self.connection.execute('SELECT data FROM checkpoints WHERE id = ?', (work_key,)).fetchone()
+        return None if row is None else checkpoint_from_bytes(work_key, row[0])
+
+    def save(self, bucketname, key, work_key, next_window, results):
+        """
+        Record the progress on a file
+
+        Args:
+            bucketname (str): S3 bucket name
+            key (str): S3 object key of the audio file
+            work_key (str): Idempotency key of the work
+            next_window (int): Index of the first window still to be processed
+            results (list[tuple(float, tuple(float))]): (offset, confidences) pairs of the processed windows
+        """
+        self.connection.execute('INSERT OR REPLACE INTO checkpoints VALUES (?, ?)',
+                                (work_key, checkpoint_to_bytes(work_key, next_window, results)))
+
+    def delete(self, bucketname, key, work_key):
+        """
+        Drop the checkpoint of a finished file
+
+        Args:
+            bucketname (str): S3 bucket name
+            key (str): S3 object key of the audio file
+            work_key (str): Idempotency key of the work
+        """
+        self.connection.execute('DELETE FROM checkpoints WHERE id = ?', (work_key,))
+
+
+class S3CheckpointStore:
+    """
+    Checkpoints kept next to the audio file in S3
+    """
+
+    def __init__(self):
+        self.client = get_client('s3')
+
+    def load(self, bucketname, key, work_key):
+        """
+        Read the progress on a file
+
+        Args:
+            bucketname (str): S3 bucket name
+            key (str): S3 object key of the audio file
+            work_key (str): Idempotency key of the work
+
+        Returns:
+            tuple(int, list[tuple(float, tuple(float))]): next window and results, None without a checkpoint
+        """
+        try:
+            response = self.client.get_object(Bucket=bucketname, Key=key + CHECKPOINT_SUFFIX)
+        except ClientError as error:
+            if error.response['Error']['Code'] == 'NoSuchKey':
+                return None
+            raise
+        return checkpoint_from_bytes(work_key, response['Body'].read())
+
+    def save(self, bucketname, key, work_key, next_window, results):
+        """
+        Record the progress on a file
+
+        Args:
+            bucketname (str): S3 bucket name
+            key (str): S3 object key of the audio file
+            work_key (str): Idempotency key of the work
+            next_window (int): Index of the first window still to be processed
+            results (list[tuple(float, tuple(float))]): (offset, confidences) pairs of the processed windows
+        """
+        self.client.put_object(Bucket=bucketname, Key=key + CHECKPOINT_SUFFIX,
+                               Body=checkpoint_to_bytes(work_key, next_window, results))
+
+    def delete(self, bucketname, key, work_key):
+        """
+        Drop the checkpoint of a finished file
+
+        Args:
+            bucketname (str): S3 bucket name
+            key (str): S3 object key of the audio file
+            work_key (str): Idempotency key of the work
+        """
+        self.client.delete_object(Bucket=bucketname, Key=key + CHECKPOINT_SUFFIX)
+
+
+def get_checkpoint_store():
+    """
+    Select the checkpoint backend from the environment
+
+    Returns:
+        S3CheckpointStore, SQLiteCheckpointStore or None if checkpointing is disabled
+    """
+    if CHECKPOINT_DB:
+        return SQLiteCheckpointStore(CHECKPOINT_DB)
+    if CHECKPOINT:
+        return S3CheckpointStore()
+    return None
+
+
+def request_continuation(event, context):
+    """
+    Invoke this function again, asynchronously, to carry on with the unfinished records
+
+    Args:
+        event (dictionary): S3 event holding the records still to be processed
+        context (dictionary): Lambda execution context of the current invocation
+    """
+    get_client('lambda').invoke(FunctionName=context.invoked_function_arn, InvocationType='Event',
+                                Payload=json.dumps(event).encode())
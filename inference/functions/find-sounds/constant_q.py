@@ -0,0 +1,156 @@
+"""
+Amazon Software License
+
+1. Definitions
+“Licensor” means any person or entity that distributes its Work.
+
+“Software” means the original work of authorship made available under this License.
+
+“Work” means the Software and any additions to or derivative works of the Software that are made available
+under this License.
+
+The terms “reproduce,” “reproduction,” “derivative works,” and “distribution” have the meaning as provided
+under U.S. copyright law; provided, however, that for the purposes of this License, derivative works shall
+not include works that remain separable from, or merely link (or bind by name) to the interfaces of, the Work.
+
+Works, including the Software, are “made available” under this License by including in or with the Work either
+(a) a copyright notice referencing the applicability of this License to the Work, or (b) a copy of this License.
+
+2. License Grants
+2.1 Copyright Grant. Subject to the terms and conditions of this License, each Licensor grants to you a perpetual,
+worldwide, non-exclusive, royalty-free, copyright license to reproduce, prepare derivative works of, publicly
+display, publicly perform, sublicense and distribute its Work and any resulting derivative works in any form.
+2.2 Patent Grant. Subject to the terms and conditions of this License, each Licensor grants to you a perpetual,
+worldwide, non-exclusive, royalty-free patent license to make, have made, use, sell, offer for sale, import,
+and otherwise transfer its Work, in whole or in part. The foregoing license applies only to the patent claims
+licensable by Licensor that would be infringed by Licensor’s Work (or portion thereof) individually and excluding
+any combinations with any other materials or technology.
+
+3. Limitations
+3.1 Redistribution. You may reproduce or distribute the Work only if (a) you do so under this License, (b) you include
+a complete copy of this License with your distribution, and (c) you retain without modification any copyright, patent,
+trademark, or attribution notices that are present in the Work.
+3.2 Derivative Works. You may specify that additional or different terms apply to the use, reproduction, and distribution
+of your derivative works of the Work (“Your Terms”) only if (a) Your Terms provide that the use limitation in Section 3.3
+applies to your derivative works, and (b) you identify the specific derivative works that are subject to Your Terms.
+Notwithstanding Your Terms, this License (including the redistribution requirements in Section 3.1) will continue to
+apply to the Work itself.
+3.3 Use Limitation. The Work and any derivative works thereof only may be used or intended for use with the web services,
+computing platforms or applications provided by Amazon.com, Inc. or its affiliates, including Amazon Web Services, Inc.
+3.4 Patent Claims. If you bring or threaten to bring a patent claim against any Licensor (including any claim,
+cross-claim or counterclaim in a lawsuit) to enforce any patents that you allege are infringed by any Work, then your
+rights under this License from such Licensor (including the grants in Sections 2.1 and 2.2) will terminate immediately.
+3.5 Trademarks. This License does not grant any rights to use any Licensor’s or its affiliates’ names, logos, or
+trademarks, except as necessary to reproduce the notices described in this License.
+3.6 Termination. If you violate any term of this License, then your rights under this License (including the grants
+in Sections 2.1 and 2.2) will terminate immediately.
+
+4. Disclaimer of Warranty.
+THE WORK IS PROVIDED “AS IS” WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING WARRANTIES
+OR CONDITIONS OF M ERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, TITLE OR NON-INFRINGEMENT. YOU BEAR THE RISK OF
+UNDERTAKING ANY ACTIVITIES UNDER THIS LICENSE. SOME STATES’ CONSUMER LAWS DO NOT ALLOW EXCLUSION OF AN IMPLIED WARRANTY,
+SO THIS DISCLAIMER MAY NOT APPLY TO YOU.
+
+5. Limitation of Liability.
+EXCEPT AS PROHIBITED BY APPLICABLE LAW, IN NO EVENT AND UNDER NO LEGAL THEORY, WHETHER IN TORT (INCLUDING NEGLIGENCE),
+CONTRACT, OR OTHERWISE SHALL ANY LICENSOR BE LIABLE TO YOU FOR DAMAGES, INCLUDING ANY DIRECT, INDIRECT, SPECIAL,
+INCIDENTAL, OR CONSEQUENTIAL DAMAGES ARISING OUT OF OR RELATED TO THIS LICENSE, THE USE OR INABILITY TO USE THE WORK
+(INCLUDING BUT NOT LIMITED TO LOSS OF GOODWILL, BUSINESS INTERRUPTION, LOST PROFITS OR DATA, COMPUTER FAILURE OR
+MALFUNCTION, OR ANY OTHER COMM ERCIAL DAMAGES OR LOSSES), EVEN IF THE LICENSOR HAS BEEN ADVISED OF THE POSSIBILITY
+OF SUCH DAMAGES.
+
+Effective Date – April 18, 2008 © 2008 Amazon.com, Inc. or its affiliates. All rights reserved.
+"""
+import numpy as np
+from librosa import stft
+from librosa import filters
+from librosa import note_to_hz
+from librosa import cqt_frequencies
+from librosa.util import normalize
+
+# Lowest bin of librosa's default CQT, band limited transforms keep to the same grid
+CQT_FMIN = note_to_hz('C1')
+
+# Engines built so far, by sample rate, frequency range and bins per octave
+engine_cache = dict()
+
+
+class ConstantQ:
+    """
+    Constant-Q transform of a fixed frequency band with kernels built once
+
+    Only the bins visible in freq_range are computed, directly from a single STFT
+    at the full sample rate rather than through librosa's multirate decimation.
+    Tuning is fixed at A440, so clips are not re-tuned individually as with
+    librosa.cqt(tuning=None). Input can be a single clip or a 2D array holding a
+    batch of equal-length clips.
+    """
+
+    def __init__(self, sr, freq_range, bins_per_octave=12, hop_length=512):
+        self.sr = sr
+        self.bins_per_octave = bins_per_octave
+        self.hop_length = hop_length
+
+        # bins on the C1 grid whose display extent overlaps freq_range
+        first = int(np.floor(bins_per_octave * np.log2(freq_range[0] / CQT_FMIN) - 0.5)) + 1
+        last = int(np.ceil(bins_per_octave * np.log2(freq_range[1] / CQT_FMIN) + 0.5)) - 1
+        self.fmin = CQT_FMIN * 2.0 ** (first / bins_per_octave)
+        self.n_bins = last - first + 1
+        freqs = cqt_frequencies(self.n_bins, fmin=self.fmin, bins_per_octave=bins_per_octave)
+
+        basis, lengths = filters.wavelet(freqs=freqs, sr=sr, pad_fft=True)
+        self.n_fft = basis.shape[1]
+        if self.n_fft < 2.0 ** (1 + np.ceil(np.log2(hop_length))):
+            self.n_fft = int(2.0 ** (1 + np.ceil(np.log2(hop_length))))
+
+        # same normalization as librosa.cqt with scale=True
+        basis *= lengths[:, np.newaxis] / float(self.n_fft)
+        fft_basis = np.fft.fft(basis, n=self.n_fft, axis=1)[:, :self.n_fft // 2 + 1]
+        self.fft_basis = (fft_basis / np.sqrt(lengths)[:, np.newaxis]).astype(np.complex64)
+
+        self.chroma_basis = filters.cq_to_chroma(self.n_bins, bins_per_octave=bins_per_octave,
+                                                 n_chroma=12, fmin=self.fmin)
+
+    def transform(self, y):
+        """
+        Constant-Q transform of one clip or a batch of clips
+
+        Args:
+            y (NumPy.array): Samples, 1D for a clip or 2D (clips, samples) for a batch
+
+        Returns:
+            NumPy.array: Complex response, (bins, frames) or (clips, bins, frames)
+        """
+        D = stft(y, n_fft=self.n_fft, hop_length=self.hop_length, window='ones', pad_mode='constant')
+        return np.matmul(self.fft_basis, D)
+
+    def chroma(self, y):
+        """
+        Chromagram built from the band limited constant-Q magnitudes
+
+        Args:
+            y (NumPy.array): Samples, 1D for a clip or 2D (clips, samples) for a batch
+
+        Returns:
+            NumPy.array: Chroma energy normalized per frame, (12, frames) or (clips, 12, frames)
+        """
+        C = np.abs(self.transform(y))
+        return normalize(np.matmul(self.chroma_basis, C), norm=np.inf, axis=-2)
+
+
+def get_constant_q(sr, freq_range, bins_per_octave=12):
+    """
+    Return the cached ConstantQ engine for a sample rate and frequency range
+
+    Args:
+        sr (int): Sample Frequency
+        freq_range (list, 2 dimensional array (min .. max frequency)): Band to compute
+        bins_per_octave (int, optional): Frequency resolution. Defaults to 12.
+
+    Returns:
+        ConstantQ: Engine with kernels for the band
+    """
+    key = (sr, tuple(freq_range), bins_per_octave)
+    if key not in engine_cache:
+        engine_cache[key] = ConstantQ(sr, freq_range, bins_per_octave=bins_per_octave)
+    return engine_cache[key]
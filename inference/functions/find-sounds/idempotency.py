@@ -0,0 +1,279 @@
+"""
+Amazon Software License
+
+1. Definitions
+“Licensor” means any person or entity that distributes its Work.
+
+“Software” means the original work of authorship made available under this License.
+
+“Work” means the Software and any additions to or derivative works of the Software that are made available
+under this License.
+
+The terms “reproduce,” “reproduction,” “derivative works,” and “distribution” have the meaning as provided
+under U.S. copyright law; provided, however, that for the purposes of this License, derivative works shall
+not include works that remain separable from, or merely link (or bind by name) to the interfaces of, the Work.
+
+Works, including the Software, are “made available” under this License by including in or with the Work either
+(a) a copyright notice referencing the applicability of this License to the Work, or (b) a copy of this License.
+
+2. License Grants
+2.1 Copyright Grant. Subject to the terms and conditions of this License, each Licensor grants to you a perpetual,
+worldwide, non-exclusive, royalty-free, copyright license to reproduce, prepare derivative works of, publicly
+display, publicly perform, sublicense and distribute its Work and any resulting derivative works in any form.
+2.2 Patent Grant. Subject to the terms and conditions of this License, each Licensor grants to you a perpetual,
+worldwide, non-exclusive, royalty-free patent license to make, have made, use, sell, offer for sale, import,
+and otherwise transfer its Work, in whole or in part. The foregoing license applies only to the patent claims
+licensable by Licensor that would be infringed by Licensor’s Work (or portion thereof) individually and excluding
+any combinations with any other materials or technology.
+
+3. Limitations
+3.1 Redistribution. You may reproduce or distribute the Work only if (a) you do so under this License, (b) you include
+a complete copy of this License with your distribution, and (c) you retain without modification any copyright, patent,
+trademark, or attribution notices that are present in the Work.
+3.2 Derivative Works. You may specify that additional or different terms apply to the use, reproduction, and distribution
+of your derivative works of the Work (“Your Terms”) only if (a) Your Terms provide that the use limitation in Section 3.3
+applies to your derivative works, and (b) you identify the specific derivative works that are subject to Your Terms.
+Notwithstanding Your Terms, this License (including the redistribution requirements in Section 3.1) will continue to
+apply to the Work itself.
+3.3 Use Limitation. The Work and any derivative works thereof only may be used or intended for use with the web services,
+computing platforms or applications provided by Amazon.com, Inc. or its affiliates, including Amazon Web Services, Inc.
+3.4 Patent Claims. If you bring or threaten to bring a patent claim against any Licensor (including any claim,
+cross-claim or counterclaim in a lawsuit) to enforce any patents that you allege are infringed by any Work, then your
+rights under this License from such Licensor (including the grants in Sections 2.1 and 2.2) will terminate immediately.
+3.5 Trademarks. This License does not grant any rights to use any Licensor’s or its affiliates’ names, logos, or
+trademarks, except as necessary to reproduce the notices described in this License.
+3.6 Termination. If you violate any term of this License, then your rights under this License (including the grants
+in Sections 2.1 and 2.2) will terminate immediately.
+
+4. Disclaimer of Warranty.
+THE WORK IS PROVIDED “AS IS” WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING WARRANTIES
+OR CONDITIONS OF M ERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, TITLE OR NON-INFRINGEMENT. YOU BEAR THE RISK OF
+UNDERTAKING ANY ACTIVITIES UNDER THIS LICENSE. SOME STATES’ CONSUMER LAWS DO NOT ALLOW EXCLUSION OF AN IMPLIED WARRANTY,
+SO THIS DISCLAIMER MAY NOT APPLY TO YOU.
+
+5. Limitation of Liability.
+EXCEPT AS PROHIBITED BY APPLICABLE LAW, IN NO EVENT AND UNDER NO LEGAL THEORY, WHETHER IN TORT (INCLUDING NEGLIGENCE),
+CONTRACT, OR OTHERWISE SHALL ANY LICENSOR BE LIABLE TO YOU FOR DAMAGES, INCLUDING ANY DIRECT, INDIRECT, SPECIAL,
+INCIDENTAL, OR CONSEQUENTIAL DAMAGES ARISING OUT OF OR RELATED TO THIS LICENSE, THE USE OR INABILITY TO USE THE WORK
+(INCLUDING BUT NOT LIMITED TO LOSS OF GOODWILL, BUSINESS INTERRUPTION, LOST PROFITS OR DATA, COMPUTER FAILURE OR
+MALFUNCTION, OR ANY OTHER COMM ERCIAL DAMAGES OR LOSSES), EVEN IF THE LICENSOR HAS BEEN ADVISED OF THE POSSIBILITY
+OF SUCH DAMAGES.
+
+Effective Date – April 18, 2008 © 2008 Amazon.com, Inc. or its affiliates. All rights reserved.
+"""
+import os
+import math
+import time
+import sqlite3
+from botocore.exceptions import ClientError
+from aws_clients import get_client
+
+# DynamoDB table holding idempotency records (deployed stack)
+IDEMPOTENCY_TABLE = os.getenv("IDEMPOTENCY_TABLE")
+# Local SQLite file holding idempotency records (testing and local runs)
+IDEMPOTENCY_DB = os.getenv("IDEMPOTENCY_DB")
+# Seconds before an in-progress record is considered abandoned when the invocation's
+# remaining time is unknown (local runs), matches the Lambda timeout
+IN_PROGRESS_EXPIRY = int(os.getenv("IDEMPOTENCY_IN_PROGRESS_EXPIRY", '900'))
+# Seconds an in-progress record outlives the invocation holding it
+IN_PROGRESS_MARGIN = int(os.getenv("IDEMPOTENCY_IN_PROGRESS_MARGIN", '10'))
+# Days to remember completed work
+COMPLETED_EXPIRY_DAYS = int(os.getenv("IDEMPOTENCY_COMPLETED_EXPIRY_DAYS", '30'))
+
+STATUS_IN_PROGRESS = 'IN_PROGRESS'
+STATUS_COMPLETED = 'COMPLETED'
+
+
+def idempotency_key(record, model_arn):
+    """
+    Build the key identifying one piece of work from an S3 event record
+
+    The ETag identifies the object content, so an overwrite with identical
+    content maps to the same key. The version ID is only used when the event
+    carries no ETag.
+
+    Args:
+        record (dictionary): S3 event record
+        model_arn (str): Rekognition model used to classify the audio
+
+    Returns:
+        str: Idempotency key
+    """
+    bucket = record['s3']['bucket']['name']
+    s3_object = record['s3']['object']
+    content_id = s3_object.get('eTag') or s3_object.get('versionId') or ''
+    return f"{bucket}/{s3_object['key']}/{content_id}/{model_arn}"
+
+
+def in_progress_expiry(context):
+    """
+    Seconds to hold an in-progress claim for
+
+    A claim ends shortly after the invocation holding it times out, so an
+    invocation that dies without releasing its claim (out of memory, or a crash
+    outside Python) does not block the retries of the event for longer.
+
+    Args:
+        context (LambdaContext): Lambda execution context, or None outside Lambda
+
+    Returns:
+        int: Seconds until the claim expires
+    """
+    if context is None:
+        return IN_PROGRESS_EXPIRY
+    return math.ceil(context.get_remaining_time_in_millis() / 1000) + IN_PROGRESS_MARGIN
+
+
+class SQLiteIdempotencyStore:
+    """
+    Idempotency records kept in a local SQLite file
+    """
+
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS idempotency '
+                                '(id TEXT PRIMARY KEY, status TEXT NOT NULL, expiration REAL NOT NULL)')
+
+    def begin(self, key, expiry=IN_PROGRESS_EXPIRY):
+        """
+        Claim a piece of work
+
+        Args:
+            key (str): Idempotency key
+            expiry (int, optional): Seconds to hold the claim for. Defaults to IN_PROGRESS_EXPIRY.
+
+        Returns:
+            bool: False if the work is completed or in progress elsewhere
+        """
+        now = time.time()
+        self.connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = self.connection.execute('SELECT status, expiration FROM idempotency WHERE id = ?',
+                                          (key,)).fetchone()
+            if row is not None and row[1] > now:
+                return False
+            self.connection.execute('INSERT OR REPLACE INTO idempotency VALUES (?, ?, ?)',
+                                    (key, STATUS_IN_PROGRESS, now + expiry))
+            return True
+        finally:
+            self.connection.execute('COMMIT')
+
+    def complete(self, key):
+        """
+        Mark claimed work as completed
+
+        Args:
+            key (str): Idempotency key
+        """
+        self.connection.execute('UPDATE idempotency SET status = ?, expiration = ? WHERE id = ?',
+                                (STATUS_COMPLETED, time.time() + COMPLETED_EXPIRY_DAYS * 86400, key))
+
+    def release(self, key):
+        """
+        Drop the claim on work that failed so that a retry can process it
+
+        Args:
+            key (str): Idempotency key
+        """
+        self.connection.execute('DELETE FROM idempotency WHERE id = ?', (key,))
+
+    def renew(self, key, expiry=IN_PROGRESS_EXPIRY):
+        """
+        Extend the claim on work that is handed off to or picked up by a continuation
+
+        Args:
+            key (str): Idempotency key
+            expiry (int, optional): Seconds to hold the claim for from now. Defaults to IN_PROGRESS_EXPIRY.
+        """
+        self.connection.execute('UPDATE idempotency SET expiration = ? WHERE id = ?',
+                                (time.time() + expiry, key))
+
+
+class DynamoDBIdempotencyStore:
+    """
+    Idempotency records kept in a DynamoDB table with a TTL on the expiration attribute
+    """
+
+    def __init__(self, table_name):
+        self.table_name = table_name
+        self.client = get_client('dynamodb')
+
+    def begin(self, key, expiry=IN_PROGRESS_EXPIRY):
+        """
+        Claim a piece of work with a conditional write
+
+        Args:
+            key (str): Idempotency key
+            expiry (int, optional): Seconds to hold the claim for. Defaults to IN_PROGRESS_EXPIRY.
+
+        Returns:
+            bool: False if the work is completed or in progress elsewhere
+        """
+        now = int(time.time())
+        try:
+            self.client.put_item(
+                TableName=self.table_name,
+                Item={'id': {'S': key},
+                      'status': {'S': STATUS_IN_PROGRESS},
+                      'expiration': {'N': str(now + expiry)}},
+                ConditionExpression='attribute_not_exists(id) OR #expiration < :now',
+                ExpressionAttributeNames={'#expiration': 'expiration'},
+                ExpressionAttributeValues={':now': {'N': str(now)}})
+        except ClientError as error:
+            if error.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return False
+            raise
+        return True
+
+    def complete(self, key):
+        """
+        Mark claimed work as completed
+
+        Args:
+            key (str): Idempotency key
+        """
+        self.client.update_item(
+            TableName=self.table_name,
+            Key={'id': {'S': key}},
+            UpdateExpression='SET #status = :status, #expiration = :expiration',
+            ExpressionAttributeNames={'#status': 'status', '#expiration': 'expiration'},
+            ExpressionAttributeValues={':status': {'S': STATUS_COMPLETED},
+                                       ':expiration': {'N': str(int(time.time()) + COMPLETED_EXPIRY_DAYS * 86400)}})
+
+    def release(self, key):
+        """
+        Drop the claim on work that failed so that a retry can process it
+
+        Args:
+            key (str): Idempotency key
+        """
+        self.client.delete_item(TableName=self.table_name, Key={'id': {'S': key}})
+
+    def renew(self, key, expiry=IN_PROGRESS_EXPIRY):
+        """
+        Extend the claim on work that is handed off to or picked up by a continuation
+
+        Args:
+            key (str): Idempotency key
+            expiry (int, optional): Seconds to hold the claim for from now. Defaults to IN_PROGRESS_EXPIRY.
+        """
+        self.client.update_item(
+            TableName=self.table_name,
+            Key={'id': {'S': key}},
+            UpdateExpression='SET #expiration = :expiration',
+            ExpressionAttributeNames={'#expiration': 'expiration'},
+            ExpressionAttributeValues={':expiration': {'N': str(int(time.time()) + expiry)}})
+
+
+def get_idempotency_store():
+    """
+    Select the idempotency backend from the environment
+
+    Returns:
+        DynamoDBIdempotencyStore, SQLiteIdempotencyStore or None if idempotency is disabled
+    """
+    if IDEMPOTENCY_TABLE:
+        return DynamoDBIdempotencyStore(IDEMPOTENCY_TABLE)
+    if IDEMPOTENCY_DB:
+        return SQLiteIdempotencyStore(IDEMPOTENCY_DB)
+    return None
@@ -0,0 +1,218 @@
+"""
+Amazon Software License
+
+1. Definitions
+“Licensor” means any person or entity that distributes its Work.
+
+“Software” means the original work of authorship made available under this License.
+
+“Work” means the Software and any additions to or derivative works of the Software that are made available
+under this License.
+
+The terms “reproduce,” “reproduction,” “derivative works,” and “distribution” have the meaning as provided
+under U.S. copyright law; provided, however, that for the purposes of this License, derivative works shall
+not include works that remain separable from, or merely link (or bind by name) to the interfaces of, the Work.
+
+Works, including the Software, are “made available” under this License by including in or with the Work either
+(a) a copyright notice referencing the applicability of this License to the Work, or (b) a copy of this License.
+
+2. License Grants
+2.1 Copyright Grant. Subject to the terms and conditions of this License, each Licensor grants to you a perpetual,
+worldwide, non-exclusive, royalty-free, copyright license to reproduce, prepare derivative works of, publicly
+display, publicly perform, sublicense and distribute its Work and any resulting derivative works in any form.
+2.2 Patent Grant. Subject to the terms and conditions of this License, each Licensor grants to you a perpetual,
+worldwide, non-exclusive, royalty-free patent license to make, have made, use, sell, offer for sale, import,
+and otherwise transfer its Work, in whole or in part. The foregoing license applies only to the patent claims
+licensable by Licensor that would be infringed by Licensor’s Work (or portion thereof) individually and excluding
+any combinations with any other materials or technology.
+
+3. Limitations
+3.1 Redistribution. You may reproduce or distribute the Work only if (a) you do so under this License, (b) you include
+a complete copy of this License with your distribution, and (c) you retain without modification any copyright, patent,
+trademark, or attribution notices that are present in the Work.
+3.2 Derivative Works. You may specify that additional or different terms apply to the use, reproduction, and distribution
+of your derivative works of the Work (“Your Terms”) only if (a) Your Terms provide that the use limitation in Section 3.3
+applies to your derivative works, and (b) you identify the specific derivative works that are subject to Your Terms.
+Notwithstanding Your Terms, this License (including the redistribution requirements in Section 3.1) will continue to
+apply to the Work itself.
+3.3 Use Limitation. The Work and any derivative works thereof only may be used or intended for use with the web services,
+computing platforms or applications provided by Amazon.com, Inc. or its affiliates, including Amazon Web Services, Inc.
+3.4 Patent Claims. If you bring or threaten to bring a patent claim against any Licensor (including any claim,
+cross-claim or counterclaim in a lawsuit) to enforce any patents that you allege are infringed by any Work, then your
+rights under this License from such Licensor (including the grants in Sections 2.1 and 2.2) will terminate immediately.
+3.5 Trademarks. This License does not grant any rights to use any Licensor’s or its affiliates’ names, logos, or
+trademarks, except as necessary to reproduce the notices described in this License.
+3.6 Termination. If you violate any term of this License, then your rights under this License (including the grants
+in Sections 2.1 and 2.2) will terminate immediately.
+
+4. Disclaimer of Warranty.
+THE WORK IS PROVIDED “AS IS” WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING WARRANTIES
+OR CONDITIONS OF M ERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, TITLE OR NON-INFRINGEMENT. YOU BEAR THE RISK OF
+UNDERTAKING ANY ACTIVITIES UNDER THIS LICENSE. SOME STATES’ CONSUMER LAWS DO NOT ALLOW EXCLUSION OF AN IMPLIED WARRANTY,
+SO THIS DISCLAIMER MAY NOT APPLY TO YOU.
+
+5. Limitation of Liability.
+EXCEPT AS PROHIBITED BY APPLICABLE LAW, IN NO EVENT AND UNDER NO LEGAL THEORY, WHETHER IN TORT (INCLUDING NEGLIGENCE),
+CONTRACT, OR OTHERWISE SHALL ANY LICENSOR BE LIABLE TO YOU FOR DAMAGES, INCLUDING ANY DIRECT, INDIRECT, SPECIAL,
+INCIDENTAL, OR CONSEQUENTIAL DAMAGES ARISING OUT OF OR RELATED TO THIS LICENSE, THE USE OR INABILITY TO USE THE WORK
+(INCLUDING BUT NOT LIMITED TO LOSS OF GOODWILL, BUSINESS INTERRUPTION, LOST PROFITS OR DATA, COMPUTER FAILURE OR
+MALFUNCTION, OR ANY OTHER COMM ERCIAL DAMAGES OR LOSSES), EVEN IF THE LICENSOR HAS BEEN ADVISED OF THE POSSIBILITY
+OF SUCH DAMAGES.
+
+Effective Date – April 18, 2008 © 2008 Amazon.com, Inc. or its affiliates. All rights reserved.
+"""
+
+import os
+import io
+import time
+import logging
+import cProfile
+import pstats
+import contextlib
+from aws_clients import get_client
+
+# When to profile an invocation: off, all, or marker (key contains PROFILE_KEY_MARKER or object metadata profile=true)
+PROFILE_MODE = os.getenv("PROFILE", 'off').lower()
+# Substring of an S3 object key that requests a profile in marker mode
+PROFILE_KEY_MARKER = os.getenv("PROFILE_KEY_MARKER", '__profile__')
+# User metadata (x-amz-meta-profile) that requests a profile in marker mode
+PROFILE_METADATA_KEY = 'profile'
+# Local directory profiles are written to
+PROFILE_DIR = os.getenv("PROFILE_DIR", '/tmp')
+# Bucket profiles are uploaded to, next to the audio file's key. Not uploaded when unset
+PROFILE_BUCKET = os.getenv("PROFILE_BUCKET")
+# Number of hot functions logged after a profiled invocation
+PROFILE_TOP_N = int(os.getenv("PROFILE_TOP_N", '25'))
+# Appended to the audio object key to name its profile
+PROFILE_SUFFIX = '.prof'
+LOGGER = logging.getLogger(__name__)
+
+
+def is_profile_key(key):
+    """
+    Check if an S3 object key names a profile rather than an audio file
+
+    Args:
+        key (str): S3 object key
+
+    Returns:
+        bool: True for profile objects
+    """
+    return key.endswith(PROFILE_SUFFIX)
+
+
+def should_profile(bucketname, key):
+    """
+    Decide whether an invocation is profiled
+
+    Only marker mode costs anything beyond a string comparison, a HEAD request
+    when the key itself carries no marker. A failed request is logged and the
+    invocation runs unprofiled.
+
+    Args:
+        bucketname (str): S3 bucket name
+        key (str): S3 object key of the audio file
+
+    Returns:
+        bool: True to run the invocation under the profiler
+    """
+    if PROFILE_MODE == 'all':
+        return True
+    if PROFILE_MODE != 'marker':
+        return False
+    if PROFILE_KEY_MARKER in key:
+        return True
+    try:
+        metadata = get_client('s3').head_object(Bucket=bucketname, Key=key).get('Metadata', {})
+    except Exception:  # noqa: B902
+        LOGGER.exception("Couldn't read the metadata of %s in bucket %s, not profiling.", key, bucketname)
+        return False
+    return metadata.get(PROFILE_METADATA_KEY, '').lower() == 'true'
+
+
+def hot_functions(profiler, top_n=PROFILE_TOP_N):
+    """
+    Summarise a profile as text
+
+    Args:
+        profiler (cProfile.Profile): Finished profiler
+        top_n (int, optional): Functions listed. Defaults to PROFILE_TOP_N.
+
+    Returns:
+        str: The top functions by cumulative and by own time
+    """
+    summary = io.StringIO()
+    stats = pstats.Stats(profiler, stream=summary).strip_dirs()
+    stats.sort_stats('cumulative').print_stats(top_n)
+    stats.sort_stats('tottime').print_stats(top_n)
+    return summary.getvalue()
+
+
+def save_profile(profiler, bucketname, key):
+    """
+    Write a pstats profile to PROFILE_DIR and, if configured, to PROFILE_BUCKET
+
+    Args:
+        profiler (cProfile.Profile): Finished profiler
+        bucketname (str): S3 bucket name of the audio file
+        key (str): S3 object key of the audio file
+
+    Returns:
+        str: Local path of the profile
+    """
+    name = f'{key}.{time.strftime("%Y%m%dT%H%M%S")}{PROFILE_SUFFIX}'
+    profile_path = os.path.join(PROFILE_DIR, name.replace('/', '_'))
+    profiler.dump_stats(profile_path)
+    if PROFILE_BUCKET:
+        get_client('s3').upload_file(profile_path, PROFILE_BUCKET, name)
+        print(f'Uploaded profile of {key} in bucket {bucketname} to s3://{PROFILE_BUCKET}/{name}')
+    return profile_path
+
+
+@contextlib.contextmanager
+def run_profiler(bucketname, key):
+    """
+    Profile the enclosed block, then save the profile and log its hot functions
+
+    Saving and summarising never change the outcome of the block: a failure is
+    logged, and an exception raised by the block propagates unchanged.
+
+    Args:
+        bucketname (str): S3 bucket name
+        key (str): S3 object key of the audio file
+
+    Yields:
+        cProfile.Profile: The running profiler
+    """
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        elapsed = time.perf_counter() - start
+        try:
+            profile_path = save_profile(profiler, bucketname, key)
+            print(f'Profiled {key} in bucket {bucketname}: {elapsed:.2f} s, written to {profile_path}')
+            print(hot_functions(profiler))
+        except Exception:  # noqa: B902
+            LOGGER.exception("Couldn't save the profile of %s in bucket %s.", key, bucketname)
+
+
+def profile_invocation(bucketname, key):
+    """
+    Context manager running the enclosed work under cProfile when requested
+
+    With profiling off this is a no-op context, so the hook can stay deployed.
+
+    Args:
+        bucketname (str): S3 bucket name
+        key (str): S3 object key of the audio file
+
+    Returns:
+        contextlib.AbstractContextManager: The profiling or a null context
+    """
+    if PROFILE_MODE == 'off' or not should_profile(bucketname, key):
+        return contextlib.nullcontext()
+    return run_profiler(bucketname, key)
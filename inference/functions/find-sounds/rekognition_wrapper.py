@@ -61,18 +61,66 @@ OF SUCH DAMAGES.
 
 Effective Date – April 18, 2008 © 2008 Amazon.com, Inc. or its affiliates. All rights reserved.
 """
-import boto3
+import io
 import os
+import json
 import backoff
+from concurrent.futures import ThreadPoolExecutor
 from botocore.exceptions import ClientError
+from aws_clients import get_client, is_shared_client
 
 # Environment variables
 REGION = os.getenv('AWS_REGION', 'us-east-1')
 REK_MODEL_ARN = os.getenv('REK_MODEL_ARN')
+# JSON list of models to classify every image with, each entry holding
+# name, arn, label and min_confidence. Defaults to REK_MODEL_ARN alone.
+REK_MODELS = os.getenv('REK_MODELS')
 
 
 # Rekognition Boto hook
-CLIENT = boto3.client('rekognition', region_name=REGION)
+CLIENT = get_client('rekognition', region_name=REGION)
+# Threads used to send one image to several models at once
+EXECUTOR = ThreadPoolExecutor(max_workers=8)
+
+
+def reset_after_fork():
+    """
+    Give a forked child (shard or render worker) its own executor and client
+
+    A child inherits the parent's executor but not its threads, so work
+    submitted to it would never run, and the client's pooled connections
+    would be shared with the parent and the other children.
+    """
+    global EXECUTOR, CLIENT
+    EXECUTOR = ThreadPoolExecutor(max_workers=8)
+    if is_shared_client(CLIENT):
+        CLIENT = get_client('rekognition', region_name=REGION)
+
+
+os.register_at_fork(after_in_child=reset_after_fork)
+
+
+def get_models(default_label='alarm', default_min_confidence=0.9):
+    """
+    Load the list of models to classify every image with
+
+    Args:
+        default_label (str, optional): Label looked up when a model entry has none. Defaults to 'alarm'.
+        default_min_confidence (float, optional): Threshold used when a model entry has none. Defaults to 0.9.
+
+    Returns:
+        list[dictionary]: name, arn, label and min_confidence for every model
+    """
+    if REK_MODELS:
+        models = json.loads(REK_MODELS)
+    else:
+        models = [{'name': default_label, 'arn': REK_MODEL_ARN}]
+
+    for index, model in enumerate(models):
+        model.setdefault('label', default_label)
+        model.setdefault('name', model['label'] if len(models) == 1 else f"{model['label']}-{index}")
+        model['min_confidence'] = float(model.get('min_confidence', default_min_confidence))
+    return models
 
 
 def show_custom_labels(image_buff=None, min_conf=0, arn=REK_MODEL_ARN):
@@ -96,6 +144,30 @@ def show_custom_labels(image_buff=None, min_conf=0, arn=REK_MODEL_ARN):
         return response['CustomLabels']
 
 
+def classify_with_models(image_buff, models):
+    """
+    Send the same image to every configured model concurrently
+
+    Args:
+        image_buff (io.BytesIO): Buffer containing the .png structured image data
+        models (list[dictionary]): Models returned by get_models
+
+    Returns:
+        tuple(float): Confidence (0 .. 1) of each model's label, in model order
+    """
+    image_buff.seek(0)
+    image_bytes = image_buff.read()
+    futures = [EXECUTOR.submit(get_labels, io.BytesIO(image_bytes), model['arn'])
+               for model in models]
+
+    confidences = []
+    for model, future in zip(models, futures):
+        labels = future.result()['CustomLabels']
+        label = next((item for item in labels if item['Name'] == model['label']), None)
+        confidences.append(float(label['Confidence']) / 100 if label is not None else 0.0)
+    return tuple(confidences)
+
+
 @backoff.on_exception(backoff.expo,
                       ClientError,
                       max_time=60,
@@ -115,6 +187,8 @@ def get_labels(image_buffer, arn, min_confidence=0):
         dictionary: by classification, confidence scores
     """
     # define reaction to fasiled call
+    # a retry after throttling reads the image again
+    image_buffer.seek(0)
     response = CLIENT.detect_custom_labels(
         Image={'Bytes': image_buffer.read()},
         MinConfidence=min_confidence,
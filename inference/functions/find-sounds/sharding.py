@@ -0,0 +1,153 @@
+"""
+Amazon Software License
+
+1. Definitions
+“Licensor” means any person or entity that distributes its Work.
+
+“Software” means the original work of authorship made available under this License.
+
+“Work” means the Software and any additions to or derivative works of the Software that are made available
+under this License.
+
+The terms “reproduce,” “reproduction,” “derivative works,” and “distribution” have the meaning as provided
+under U.S. copyright law; provided, however, that for the purposes of this License, derivative works shall
+not include works that remain separable from, or merely link (or bind by name) to the interfaces of, the Work.
+
+Works, including the Software, are “made available” under this License by including in or with the Work either
+(a) a copyright notice referencing the applicability of this License to the Work, or (b) a copy of this License.
+
+2. License Grants
+2.1 Copyright Grant. Subject to the terms and conditions of this License, each Licensor grants to you a perpetual,
+worldwide, non-exclusive, royalty-free, copyright license to reproduce, prepare derivative works of, publicly
+display, publicly perform, sublicense and distribute its Work and any resulting derivative works in any form.
+2.2 Patent Grant. Subject to the terms and conditions of this License, each Licensor grants to you a perpetual,
+worldwide, non-exclusive, royalty-free patent license to make, have made, use, sell, offer for sale, import,
+and otherwise transfer its Work, in whole or in part. The foregoing license applies only to the patent claims
+licensable by Licensor that would be infringed by Licensor’s Work (or portion thereof) individually and excluding
+any combinations with any other materials or technology.
+
+3. Limitations
+3.1 Redistribution. You may reproduce or distribute the Work only if (a) you do so under this License, (b) you include
+a complete copy of this License with your distribution, and (c) you retain without modification any copyright, patent,
+trademark, or attribution notices that are present in the Work.
+3.2 Derivative Works. You may specify that additional or different terms apply to the use, reproduction, and distribution
+of your derivative works of the Work (“Your Terms”) only if (a) Your Terms provide that the use limitation in Section 3.3
+applies to your derivative works, and (b) you identify the specific derivative works that are subject to Your Terms.
+Notwithstanding Your Terms, this License (including the redistribution requirements in Section 3.1) will continue to
+apply to the Work itself.
+3.3 Use Limitation. The Work and any derivative works thereof only may be used or intended for use with the web services,
+computing platforms or applications provided by Amazon.com, Inc. or its affiliates, including Amazon Web Services, Inc.
+3.4 Patent Claims. If you bring or threaten to bring a patent claim against any Licensor (including any claim,
+cross-claim or counterclaim in a lawsuit) to enforce any patents that you allege are infringed by any Work, then your
+rights under this License from such Licensor (including the grants in Sections 2.1 and 2.2) will terminate immediately.
+3.5 Trademarks. This License does not grant any rights to use any Licensor’s or its affiliates’ names, logos, or
+trademarks, except as necessary to reproduce the notices described in this License.
+3.6 Termination. If you violate any term of this License, then your rights under this License (including the grants
+in Sections 2.1 and 2.2) will terminate immediately.
+
+4. Disclaimer of Warranty.
+THE WORK IS PROVIDED “AS IS” WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING WARRANTIES
+OR CONDITIONS OF M ERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, TITLE OR NON-INFRINGEMENT. YOU BEAR THE RISK OF
+UNDERTAKING ANY ACTIVITIES UNDER THIS LICENSE. SOME STATES’ CONSUMER LAWS DO NOT ALLOW EXCLUSION OF AN IMPLIED WARRANTY,
+SO THIS DISCLAIMER MAY NOT APPLY TO YOU.
+
+5. Limitation of Liability.
+EXCEPT AS PROHIBITED BY APPLICABLE LAW, IN NO EVENT AND UNDER NO LEGAL THEORY, WHETHER IN TORT (INCLUDING NEGLIGENCE),
+CONTRACT, OR OTHERWISE SHALL ANY LICENSOR BE LIABLE TO YOU FOR DAMAGES, INCLUDING ANY DIRECT, INDIRECT, SPECIAL,
+INCIDENTAL, OR CONSEQUENTIAL DAMAGES ARISING OUT OF OR RELATED TO THIS LICENSE, THE USE OR INABILITY TO USE THE WORK
+(INCLUDING BUT NOT LIMITED TO LOSS OF GOODWILL, BUSINESS INTERRUPTION, LOST PROFITS OR DATA, COMPUTER FAILURE OR
+MALFUNCTION, OR ANY OTHER COMM ERCIAL DAMAGES OR LOSSES), EVEN IF THE LICENSOR HAS BEEN ADVISED OF THE POSSIBILITY
+OF SUCH DAMAGES.
+
+Effective Date – April 18, 2008 © 2008 Amazon.com, Inc. or its affiliates. All rights reserved.
+"""
+import os
+import numpy as np
+from render_pool import fork_map
+
+# Number of parallel workers used to process a sharded file, bounded in Lambda
+# by the vCPUs of the configured memory size
+SHARD_WORKERS = int(os.getenv("SHARD_WORKERS", '1'))
+# Length of a shard in seconds, files shorter than this are not sharded
+SHARD_DURATION = int(os.getenv("SHARD_DURATION", '600'))
+
+
+def plan_shards(total_samples, shard_len, clip_len, clip_offset):
+    """
+    Split an audio file into time-range shards that can be processed independently
+
+    Each shard owns the windows that start inside [start, owned_end). Shard starts
+    fall on the clip_offset grid, so every window starts at the same absolute
+    position it would have when the file is processed in one pass. The shard audio
+    is extended by one clip past owned_end so the last owned window is complete.
+
+    Args:
+        total_samples (int): Length of the audio file in samples
+        shard_len (int): Requested shard length in samples
+        clip_len (int): Length of a single clip in samples
+        clip_offset (int): Samples to advance between clips
+
+    Returns:
+        list[tuple(int, int, int)]: (start, owned_end, end) sample positions for each shard
+    """
+    # keep shard boundaries on the window grid
+    shard_len = max(clip_offset, (shard_len // clip_offset) * clip_offset)
+
+    shards = []
+    start = 0
+    while start < total_samples:
+        owned_end = min(start + shard_len, total_samples)
+        # a window at owned_end would add nothing when the one before it reaches the end of the file
+        if owned_end - clip_offset + clip_len >= total_samples:
+            owned_end = total_samples
+        end = min(owned_end + clip_len, total_samples)
+        shards.append((start, owned_end, end))
+        start = owned_end
+    return shards
+
+
+def merge_timelines(shard_timelines):
+    """
+    Merge per-shard results back into a single timeline
+
+    Windows reported by more than one shard (from the overlap region) are
+    deduplicated on their absolute offset, keeping the highest confidence of
+    each model.
+
+    Args:
+        shard_timelines (list[list[tuple(float, tuple(float))]]): (offset, confidences) pairs per shard
+
+    Returns:
+        list[tuple(float, tuple(float))]: (offset, confidences) pairs ordered by offset
+    """
+    merged = {}
+    for timeline in shard_timelines:
+        for offset, confidences in timeline:
+            key = round(offset, 3)
+            if key in merged:
+                confidences = tuple(max(pair) for pair in zip(merged[key], confidences))
+            merged[key] = confidences
+    return sorted(merged.items())
+
+
+def run_shards(worker, shard_args, workers=SHARD_WORKERS):
+    """
+    Dispatch shards to forked worker processes and collect the results in shard order
+
+    The workers are connected by pipes (see render_pool.fork_map), so this also
+    runs inside Lambda, which has no /dev/shm for a process pool.
+
+    Args:
+        worker (function): Called once per shard
+        shard_args (list[tuple]): Positional arguments for each call of worker
+        workers (int, optional): Worker processes. Defaults to SHARD_WORKERS.
+
+    Returns:
+        list: Result of worker for each shard
+    """
+    if workers <= 1 or len(shard_args) <= 1:
+        return [worker(*args) for args in shard_args]
+
+    # the arguments are inherited by the workers, only shard indices are sent
+    return list(fork_map(lambda index: worker(*shard_args[index]), np.arange(len(shard_args)),
+                         workers=min(workers, len(shard_args))))
@@ -62,16 +62,28 @@ OF SUCH DAMAGES.
 Effective Date – April 18, 2008 © 2008 Amazon.com, Inc. or its affiliates. All rights reserved.
 """
 import logging
-import boto3
 from botocore.exceptions import ClientError
+from aws_clients import get_client, is_shared_client
 import os
 
 # Variables supplied by the environment
-SNS_CLIENT = boto3.client('sns')
+SNS_CLIENT = get_client('sns')
 TOPIC_ARN = os.getenv("SNS_TOPIC_ARN")
 LOGGER = logging.getLogger(__name__)
 
 
+def reset_after_fork():
+    """
+    Give a forked child its own client rather than the parent's pooled connections
+    """
+    global SNS_CLIENT
+    if is_shared_client(SNS_CLIENT):
+        SNS_CLIENT = get_client('sns')
+
+
+os.register_at_fork(after_in_child=reset_after_fork)
+
+
 def publish_message(message, attributes):
     """
     Send a message to a configured SNS Topic
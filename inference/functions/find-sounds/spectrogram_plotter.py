@@ -66,22 +66,109 @@ import matplotlib.pyplot as plt
 from librosa.feature import melspectrogram
 from librosa.display import specshow
 from librosa import stft
-from librosa import decompose
 from librosa import amplitude_to_db
 from librosa import power_to_db
 from librosa import feature
 from librosa import cqt
 from librosa import reassigned_spectrogram
+from constant_q import get_constant_q
+from hpss import harmonic_percussive
+from band_limited import band_spectrogram
 import numpy as np
 
+# Marker size (points^2) and alpha of the scatter rendering of the reassigned spectrogram
+REASSIGNED_MARKER_SIZE = 5
+REASSIGNED_ALPHA = 0.1
+
+
+def _box_sum(values, width):
+    """
+    Sum each element of a 2D array with its neighbours in a width x width box
+
+    Args:
+        values (NumPy.array): 2D array
+        width (int): Box size in elements
+
+    Returns:
+        NumPy.array: Array of the same shape holding the box sums
+    """
+    if width <= 1:
+        return values
+    before = (width - 1) // 2
+    after = width - 1 - before
+    for axis in (0, 1):
+        pad = [(0, 0), (0, 0)]
+        pad[axis] = (before + 1, after)
+        summed = np.cumsum(np.pad(values, pad), axis=axis)
+        values = np.take(summed, np.arange(width, summed.shape[axis]), axis=axis) - \
+            np.take(summed, np.arange(0, summed.shape[axis] - width), axis=axis)
+    return values
+
+
+def plot_reassigned(ax1, times, freqs, mags_db, freq_range, dpi):
+    """
+    Draw reassigned spectrogram points as a binned image
+
+    Rather than drawing one translucent marker per time-frequency point, the points
+    are accumulated into a 2D histogram with one bin per output pixel. Each bin is
+    spread over the area a marker would cover, and the overlapping markers are
+    composited with the same alpha as the reassigned scatter plot.
+
+    Args:
+        ax1 (Pyplot.Axes): Axes to draw into, sized as in the final image
+        times (NumPy.array): Reassigned time of every point
+        freqs (NumPy.array): Reassigned frequency of every point
+        mags_db (NumPy.array): Magnitude of every point in decibels
+        freq_range (list): Y Axis filter (min .. max frequency)
+        dpi (int): Dots per inch of the figure
+    """
+    # scatter drops points that have no reassigned time or frequency
+    valid = np.isfinite(times) & np.isfinite(freqs) & np.isfinite(mags_db)
+    times = times[valid]
+    freqs = freqs[valid]
+    mags_db = mags_db[valid]
+    if not len(mags_db):
+        # nothing to draw, e.g. a silent clip
+        return
+
+    # colour scale and x limits as picked by scatter's autoscaling
+    vmin, vmax = mags_db.min(), mags_db.max()
+    t_min, t_max = times.min(), times.max()
+    margin = 0.05 * (t_max - t_min)
+    x_range = [t_min - margin, t_max + margin]
+
+    bbox = ax1.get_window_extent()
+    width, height = max(int(round(bbox.width)), 1), max(int(round(bbox.height)), 1)
+
+    # marker diameter in pixels including its edge line, spread as a square of the same area
+    diameter = (np.sqrt(REASSIGNED_MARKER_SIZE) + matplotlib.rcParams['patch.linewidth']) * dpi / 72
+    spread = max(int(round(diameter / 2 * np.sqrt(np.pi))), 1)
+
+    weights = (mags_db - vmin) / (vmax - vmin) if vmax > vmin else np.zeros_like(mags_db)
+    bin_range = [freq_range, x_range]
+    counts, _, _ = np.histogram2d(freqs, times, bins=(height, width), range=bin_range)
+    weighted, _, _ = np.histogram2d(freqs, times, bins=(height, width), range=bin_range, weights=weights)
+
+    counts = _box_sum(counts, spread)
+    weighted = _box_sum(weighted, spread)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_weight = np.where(counts > 0, weighted / counts, 0)
+    rgba = matplotlib.colormaps['magma'](mean_weight, bytes=True)
+    rgba[..., 3] = np.round(255 * (1 - (1 - REASSIGNED_ALPHA) ** counts))
+
+    ax1.imshow(rgba, origin='lower', aspect='auto', interpolation='nearest',
+               extent=[x_range[0], x_range[1], freq_range[0], freq_range[1]])
+    ax1.set_xlim(x_range)
+
 
 def plot_spectrogram(wavdata, frequency, freq_range=[1, 8000], fig=None, fileName=None, showaxis='off',
-                     fig_height=8, fig_width=16, dpi=120, spect_type='Std', image_buffer=None):
+                     fig_height=8, fig_width=16, dpi=120, spect_type='Std', image_buffer=None, features=None):
     """
     Render supplied wav data as a spectrogram of the selected type
 
     Args:
-        wavdata (NumPy.array): Sampled wav audio data
+        wavdata (NumPy.array): Sampled wav audio data, may be None for the types that only use features
         frequency (int): Sample Frequency
         freq_range (list, 2 dimensional array (min .. max frequency): Y Axis filter. Defaults to [0, 8000].
         fig (Pyplot.Figure, optional): Existing pyplot figure. Defaults to None.
@@ -94,18 +181,29 @@ def plot_spectrogram(wavdata, frequency, freq_range=[1, 8000], fig=None, fileNam
             None = Standard (matplotlib)
             Std = Standard (matplotlib)
             Mel = Melodic (librosa)
+            Std-band = Standard, computed from audio decimated to just above twice the top of freq_range
+            Mel-band = Melodic, decimated as Std-band with mel bands covering freq_range only
             QPlot-freq = Q Plot based on Frequency (librosa)
             QPlot-axis = Q Plot based on decibels (librosa)
             Chroma = Chromagram Plot (librosa) Note: does not apply freq_range to output
+            QPlot-freq-band = Q Plot based on Frequency, bins within freq_range only
+            QPlot-axis-band = Q Plot based on decibels, bins within freq_range only
+            Chroma-band = Chromagram Plot, built from the bins within freq_range
             mfcc = Standard MFCC (librosa) Note: does not apply freq_range to output
             mfcc-rast = MFCC RASTAMAT (librosa) Note: does not apply freq_range to output
             mfcc-htk = MFCC HTK Representation (librosa) Note: does not apply freq_range to output
-            reassigned = Reassigned spectrogram
+            reassigned = Reassigned spectrogram, one marker per point
+            reassigned-binned = Reassigned spectrogram, binned into an image (faster, images differ from reassigned)
             harmonic = Harmonic-Percussive Source Separation
             percussive = Harmonic-Percussive Source Separation
             wave = wave plot (matplotlib)
             Defaults to 'Std'.
         image_buffer ([type], optional): Image buffer to render image into. Defaults to None.
+        features (NumPy.array, optional): Precomputed transform of wavdata for the spect_type, e.g. the
+            STFT for Std and Mel, one row of a batched ConstantQ.transform for the QPlot band types,
+            ConstantQ.chroma for Chroma-band, the band_spectrogram result for Std-band and Mel-band
+            or the harmonic_percussive result for harmonic and percussive, which can be shared by both.
+            Defaults to None, computed from wavdata.
     """
 
     matplotlib.use('Agg')
@@ -123,17 +221,31 @@ def plot_spectrogram(wavdata, frequency, freq_range=[1, 8000], fig=None, fileNam
         spect_type = 'Std'
 
     if spect_type == 'Std':
-        D = stft(wavdata)
+        D = stft(wavdata) if features is None else features
         S_db = amplitude_to_db(np.abs(D), ref=np.max)
         img = specshow(S_db, x_axis='time', y_axis='log', ax=ax1)
         ax1.axis(showaxis)
         ax1.set_ylim(freq_range)
     elif spect_type == 'Mel':
-        S = melspectrogram(y=wavdata, sr=frequency)
+        S = melspectrogram(y=wavdata, sr=frequency) if features is None else \
+            melspectrogram(S=np.abs(features) ** 2, sr=frequency)
         S_db = power_to_db(S, ref=np.max)
         img = specshow(S_db, x_axis='time', y_axis='mel', ax=ax1)
         ax1.set_ylim(freq_range)
         ax1.axis(showaxis)
+    elif spect_type == 'Std-band':
+        S, band_sr, hop_length = band_spectrogram(wavdata, frequency, freq_range) if features is None else features
+        S_db = amplitude_to_db(S, ref=np.max)
+        img = specshow(S_db, sr=band_sr, hop_length=hop_length, x_axis='time', y_axis='log', ax=ax1)
+        ax1.axis(showaxis)
+        ax1.set_ylim(freq_range)
+    elif spect_type == 'Mel-band':
+        S, band_sr, hop_length = band_spectrogram(wavdata, frequency, freq_range, mel=True) if features is None else features
+        S_db = power_to_db(S, ref=np.max)
+        img = specshow(S_db, sr=band_sr, hop_length=hop_length, x_axis='time', y_axis='mel',
+                       fmin=freq_range[0], fmax=freq_range[1], ax=ax1)
+        ax1.set_ylim(freq_range)
+        ax1.axis(showaxis)
     elif spect_type == 'QPlot-freq':
         C = cqt(y=wavdata, sr=frequency)
         C_db = amplitude_to_db(np.abs(C), ref=np.max)
@@ -151,6 +263,25 @@ def plot_spectrogram(wavdata, frequency, freq_range=[1, 8000], fig=None, fileNam
         img = specshow(chroma, x_axis='time', y_axis='chroma', ax=ax1)
         # ax1.set_ylim(freq_range)
         ax1.axis(showaxis)
+    elif spect_type == 'QPlot-freq-band':
+        cq = get_constant_q(frequency, freq_range)
+        C = cq.transform(wavdata) if features is None else features
+        C_db = amplitude_to_db(np.abs(C), ref=np.max)
+        img = specshow(C_db, x_axis='time', y_axis='cqt_hz', fmin=cq.fmin, bins_per_octave=cq.bins_per_octave, ax=ax1)
+        ax1.axis(showaxis)
+        ax1.set_ylim(freq_range)
+    elif spect_type == 'QPlot-axis-band':
+        cq = get_constant_q(frequency, freq_range)
+        C = cq.transform(wavdata) if features is None else features
+        C_db = amplitude_to_db(np.abs(C), ref=np.max)
+        img = specshow(C_db, x_axis='time', y_axis='cqt_note', fmin=cq.fmin, bins_per_octave=cq.bins_per_octave, ax=ax1)
+        ax1.set_ylim(freq_range)
+        ax1.axis(showaxis)
+    elif spect_type == 'Chroma-band':
+        chroma = get_constant_q(frequency, freq_range, bins_per_octave=36).chroma(wavdata) if features is None else features
+        img = specshow(chroma, x_axis='time', y_axis='chroma', ax=ax1)
+        # ax1.set_ylim(freq_range)
+        ax1.axis(showaxis)
     elif spect_type == 'mfcc':
         mfccs = feature.mfcc(y=wavdata, sr=frequency, n_mfcc=40)
         img = specshow(mfccs, x_axis='time', ax=ax1)
@@ -168,17 +299,23 @@ def plot_spectrogram(wavdata, frequency, freq_range=[1, 8000], fig=None, fileNam
         ax1.axis(showaxis)
     elif spect_type == 'reassigned':
         n_fft = 64
-        m_htk = feature.mfcc(y=wavdata, sr=frequency, dct_type=3)
         freqs, times, mags = reassigned_spectrogram(y=wavdata, sr=frequency,
                                                     n_fft=n_fft)
         mags_db = power_to_db(mags, ref=np.max)
-        ax1.scatter(times, freqs, c=mags_db, cmap="magma", alpha=0.1, s=5)
+        ax1.scatter(times, freqs, c=mags_db, cmap="magma", alpha=REASSIGNED_ALPHA, s=REASSIGNED_MARKER_SIZE)
         ax1.axis(showaxis)
         ax1.set_ylim(freq_range)
         # ax1.set(title='Reassigned spectrogram')
+    elif spect_type == 'reassigned-binned':
+        n_fft = 64
+        freqs, times, mags = reassigned_spectrogram(y=wavdata, sr=frequency,
+                                                    n_fft=n_fft)
+        mags_db = power_to_db(mags, ref=np.max)
+        plot_reassigned(ax1, times, freqs, mags_db, freq_range, dpi)
+        ax1.axis(showaxis)
+        ax1.set_ylim(freq_range)
     elif spect_type == 'harmonic':
-        D = stft(y=wavdata)
-        D_harmonic, D_percussive = decompose.hpss(D)
+        D, D_harmonic, D_percussive = harmonic_percussive(wavdata) if features is None else features
         rp = np.max(np.abs(D))
 
         specshow(amplitude_to_db(np.abs(D_harmonic), ref=rp),
@@ -188,8 +325,7 @@ def plot_spectrogram(wavdata, frequency, freq_range=[1, 8000], fig=None, fileNam
         ax1.set_ylim(freq_range)
         ax1.axis(showaxis)
     elif spect_type == 'percussive':
-        D = stft(y=wavdata)
-        D_harmonic, D_percussive = decompose.hpss(D)
+        D, D_harmonic, D_percussive = harmonic_percussive(wavdata) if features is None else features
         rp = np.max(np.abs(D))
 
         specshow(amplitude_to_db(np.abs(D_percussive), ref=rp),
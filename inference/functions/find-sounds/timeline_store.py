@@ -0,0 +1,169 @@
+"""
+Amazon Software License
+
+1. Definitions
+“Licensor” means any person or entity that distributes its Work.
+
+“Software” means the original work of authorship made available under this License.
+
+“Work” means the Software and any additions to or derivative works of the Software that are made available
+under this License.
+
+The terms “reproduce,” “reproduction,” “derivative works,” and “distribution” have the meaning as provided
+under U.S. copyright law; provided, however, that for the purposes of this License, derivative works shall
+not include works that remain separable from, or merely link (or bind by name) to the interfaces of, the Work.
+
+Works, including the Software, are “made available” under this License by including in or with the Work either
+(a) a copyright notice referencing the applicability of this License to the Work, or (b) a copy of this License.
+
+2. License Grants
+2.1 Copyright Grant. Subject to the terms and conditions of this License, each Licensor grants to you a perpetual,
+worldwide, non-exclusive, royalty-free, copyright license to reproduce, prepare derivative works of, publicly
+display, publicly perform, sublicense and distribute its Work and any resulting derivative works in any form.
+2.2 Patent Grant. Subject to the terms and conditions of this License, each Licensor grants to you a perpetual,
+worldwide, non-exclusive, royalty-free patent license to make, have made, use, sell, offer for sale, import,
+and otherwise transfer its Work, in whole or in part. The foregoing license applies only to the patent claims
+licensable by Licensor that would be infringed by Licensor’s Work (or portion thereof) individually and excluding
+any combinations with any other materials or technology.
+
+3. Limitations
+3.1 Redistribution. You may reproduce or distribute the Work only if (a) you do so under this License, (b) you include
+a complete copy of this License with your distribution, and (c) you retain without modification any copyright, patent,
+trademark, or attribution notices that are present in the Work.
+3.2 Derivative Works. You may specify that additional or different terms apply to the use, reproduction, and distribution
+of your derivative works of the Work (“Your Terms”) only if (a) Your Terms provide that the use limitation in Section 3.3
+applies to your derivative works, and (b) you identify the specific derivative works that are subject to Your Terms.
+Notwithstanding Your Terms, this License (including the redistribution requirements in Section 3.1) will continue to
+apply to the Work itself.
+3.3 Use Limitation. The Work and any derivative works thereof only may be used or intended for use with the web services,
+computing platforms or applications provided by Amazon.com, Inc. or its affiliates, including Amazon Web Services, Inc.
+3.4 Patent Claims. If you bring or threaten to bring a patent claim against any Licensor (including any claim,
+cross-claim or counterclaim in a lawsuit) to enforce any patents that you allege are infringed by any Work, then your
+rights under this License from such Licensor (including the grants in Sections 2.1 and 2.2) will terminate immediately.
+3.5 Trademarks. This License does not grant any rights to use any Licensor’s or its affiliates’ names, logos, or
+trademarks, except as necessary to reproduce the notices described in this License.
+3.6 Termination. If you violate any term of this License, then your rights under this License (including the grants
+in Sections 2.1 and 2.2) will terminate immediately.
+
+4. Disclaimer of Warranty.
+THE WORK IS PROVIDED “AS IS” WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING WARRANTIES
+OR CONDITIONS OF M ERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, TITLE OR NON-INFRINGEMENT. YOU BEAR THE RISK OF
+UNDERTAKING ANY ACTIVITIES UNDER THIS LICENSE. SOME STATES’ CONSUMER LAWS DO NOT ALLOW EXCLUSION OF AN IMPLIED WARRANTY,
+SO THIS DISCLAIMER MAY NOT APPLY TO YOU.
+
+5. Limitation of Liability.
+EXCEPT AS PROHIBITED BY APPLICABLE LAW, IN NO EVENT AND UNDER NO LEGAL THEORY, WHETHER IN TORT (INCLUDING NEGLIGENCE),
+CONTRACT, OR OTHERWISE SHALL ANY LICENSOR BE LIABLE TO YOU FOR DAMAGES, INCLUDING ANY DIRECT, INDIRECT, SPECIAL,
+INCIDENTAL, OR CONSEQUENTIAL DAMAGES ARISING OUT OF OR RELATED TO THIS LICENSE, THE USE OR INABILITY TO USE THE WORK
+(INCLUDING BUT NOT LIMITED TO LOSS OF GOODWILL, BUSINESS INTERRUPTION, LOST PROFITS OR DATA, COMPUTER FAILURE OR
+MALFUNCTION, OR ANY OTHER COMM ERCIAL DAMAGES OR LOSSES), EVEN IF THE LICENSOR HAS BEEN ADVISED OF THE POSSIBILITY
+OF SUCH DAMAGES.
+
+Effective Date – April 18, 2008 © 2008 Amazon.com, Inc. or its affiliates. All rights reserved.
+"""
+import io
+import os
+import numpy as np
+from aws_clients import get_client, is_shared_client
+
+# Write a confidence timeline next to every processed audio file
+SAVE_TIMELINE = os.getenv("SAVE_TIMELINE", 'true').lower() == 'true'
+# Appended to the audio object key to name its timeline
+TIMELINE_SUFFIX = '.timeline.npz'
+
+S3_CLIENT = get_client('s3')
+
+
+def reset_after_fork():
+    """
+    Give a forked child its own client rather than the parent's pooled connections
+    """
+    global S3_CLIENT
+    if is_shared_client(S3_CLIENT):
+        S3_CLIENT = get_client('s3')
+
+
+os.register_at_fork(after_in_child=reset_after_fork)
+
+
+def is_timeline_key(key):
+    """
+    Check if an S3 object key names a timeline rather than an audio file
+
+    Args:
+        key (str): S3 object key
+
+    Returns:
+        bool: True for timeline objects
+    """
+    return key.endswith(TIMELINE_SUFFIX)
+
+
+def timeline_name(key, model_name=None):
+    """
+    Name of the timeline stored for an audio file
+
+    Args:
+        key (str): S3 object key or path of the audio file
+        model_name (str, optional): Added to the name when several models are run. Defaults to None.
+
+    Returns:
+        str: Timeline object key or path
+    """
+    return key + (f'.{model_name}' if model_name else '') + TIMELINE_SUFFIX
+
+
+def timeline_to_bytes(timeline, settings):
+    """
+    Pack a confidence timeline into a compressed .npz structure
+
+    Args:
+        timeline (list[tuple(float, float)]): (offset, confidence) pairs for every window
+        settings (dict): Model ARN and render settings used to produce the confidences
+
+    Returns:
+        bytes: .npz file contents
+    """
+    offsets = np.array([offset for offset, _ in timeline], dtype=np.float32)
+    confidences = np.array([confidence for _, confidence in timeline], dtype=np.float32)
+    byte_data = io.BytesIO()
+    np.savez_compressed(byte_data, offsets=offsets, confidences=confidences,
+                        **{name: np.asarray(value) for name, value in settings.items() if value is not None})
+    return byte_data.getvalue()
+
+
+def load_timeline(file):
+    """
+    Read a timeline written by save_timeline
+
+    Args:
+        file (str or io.BytesIO): Path or buffer containing the .npz data
+
+    Returns:
+        dict: offsets and confidences arrays plus the stored settings
+    """
+    with np.load(file) as data:
+        timeline = {name: data[name] for name in data.files}
+    for name, value in timeline.items():
+        if value.ndim == 0:
+            timeline[name] = value.item()
+    return timeline
+
+
+def save_timeline(bucketname, key, timeline, settings, model_name=None):
+    """
+    Store the confidence timeline for an audio file alongside it in S3
+
+    Args:
+        bucketname (str): S3 bucket name
+        key (str): S3 object key of the audio file
+        timeline (list[tuple(float, float)]): (offset, confidence) pairs for every window
+        settings (dict): Model ARN and render settings used to produce the confidences
+        model_name (str, optional): Added to the timeline key when several models are run. Defaults to None.
+
+    Returns:
+        str: S3 object key of the timeline
+    """
+    timeline_key = timeline_name(key, model_name)
+    S3_CLIENT.put_object(Bucket=bucketname, Key=timeline_key, Body=timeline_to_bytes(timeline, settings))
+    return timeline_key
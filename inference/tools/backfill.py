@@ -0,0 +1,263 @@
+"""
+Amazon Software License
+
+1. Definitions
+“Licensor” means any person or entity that distributes its Work.
+
+“Software” means the original work of authorship made available under this License.
+
+“Work” means the Software and any additions to or derivative works of the Software that are made available
+under this License.
+
+The terms “reproduce,” “reproduction,” “derivative works,” and “distribution” have the meaning as provided
+under U.S. copyright law; provided, however, that for the purposes of this License, derivative works shall
+not include works that remain separable from, or merely link (or bind by name) to the interfaces of, the Work.
+
+Works, including the Software, are “made available” under this License by including in or with the Work either
+(a) a copyright notice referencing the applicability of this License to the Work, or (b) a copy of this License.
+
+2. License Grants
+2.1 Copyright Grant. Subject to the terms and conditions of this License, each Licensor grants to you a perpetual,
+worldwide, non-exclusive, royalty-free, copyright license to reproduce, prepare derivative works of, publicly
+display, publicly perform, sublicense and distribute its Work and any resulting derivative works in any form.
+2.2 Patent Grant. Subject to the terms and conditions of this License, each Licensor grants to you a perpetual,
+worldwide, non-exclusive, royalty-free patent license to make, have made, use, sell, offer for sale, import,
+and otherwise transfer its Work, in whole or in part. The foregoing license applies only to the patent claims
+licensable by Licensor that would be infringed by Licensor’s Work (or portion thereof) individually and excluding
+any combinations with any other materials or technology.
+
+3. Limitations
+3.1 Redistribution. You may reproduce or distribute the Work only if (a) you do so under this License, (b) you include
+a complete copy of this License with your distribution, and (c) you retain without modification any copyright, patent,
+trademark, or attribution notices that are present in the Work.
+3.2 Derivative Works. You may specify that additional or different terms apply to the use, reproduction, and distribution
+of your derivative works of the Work (“Your Terms”) only if (a) Your Terms provide that the use limitation in Section 3.3
+applies to your derivative works, and (b) you identify the specific derivative works that are subject to Your Terms.
+Notwithstanding Your Terms, this License (including the redistribution requirements in Section 3.1) will continue to
+apply to the Work itself.
+3.3 Use Limitation. The Work and any derivative works thereof only may be used or intended for use with the web services,
+computing platforms or applications provided by Amazon.com, Inc. or its affiliates, including Amazon Web Services, Inc.
+3.4 Patent Claims. If you bring or threaten to bring a patent claim against any Licensor (including any claim,
+cross-claim or counterclaim in a lawsuit) to enforce any patents that you allege are infringed by any Work, then your
+rights under this License from such Licensor (including the grants in Sections 2.1 and 2.2) will terminate immediately.
+3.5 Trademarks. This License does not grant any rights to use any Licensor’s or its affiliates’ names, logos, or
+trademarks, except as necessary to reproduce the notices described in this License.
+3.6 Termination. If you violate any term of this License, then your rights under this License (including the grants
+in Sections 2.1 and 2.2) will terminate immediately.
+
+4. Disclaimer of Warranty.
+THE WORK IS PROVIDED “AS IS” WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING WARRANTIES
+OR CONDITIONS OF M ERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, TITLE OR NON-INFRINGEMENT. YOU BEAR THE RISK OF
+UNDERTAKING ANY ACTIVITIES UNDER THIS LICENSE. SOME STATES’ CONSUMER LAWS DO NOT ALLOW EXCLUSION OF AN IMPLIED WARRANTY,
+SO THIS DISCLAIMER MAY NOT APPLY TO YOU.
+
+5. Limitation of Liability.
+EXCEPT AS PROHIBITED BY APPLICABLE LAW, IN NO EVENT AND UNDER NO LEGAL THEORY, WHETHER IN TORT (INCLUDING NEGLIGENCE),
+CONTRACT, OR OTHERWISE SHALL ANY LICENSOR BE LIABLE TO YOU FOR DAMAGES, INCLUDING ANY DIRECT, INDIRECT, SPECIAL,
+INCIDENTAL, OR CONSEQUENTIAL DAMAGES ARISING OUT OF OR RELATED TO THIS LICENSE, THE USE OR INABILITY TO USE THE WORK
+(INCLUDING BUT NOT LIMITED TO LOSS OF GOODWILL, BUSINESS INTERRUPTION, LOST PROFITS OR DATA, COMPUTER FAILURE OR
+MALFUNCTION, OR ANY OTHER COMM ERCIAL DAMAGES OR LOSSES), EVEN IF THE LICENSOR HAS BEEN ADVISED OF THE POSSIBILITY
+OF SUCH DAMAGES.
+
+Effective Date – April 18, 2008 © 2008 Amazon.com, Inc. or its affiliates. All rights reserved.
+"""
+
+import argparse
+import io
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import librosa as libr
+
+FUNCTION_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'functions', 'find-sounds')
+sys.path.insert(0, FUNCTION_PATH)
+import app  # noqa: E402
+from timeline_store import timeline_name, timeline_to_bytes  # noqa: E402
+from aws_clients import get_client  # noqa: E402
+
+# File types picked up from a directory or prefix
+AUDIO_EXTENSIONS = ('.wav', '.flac', '.ogg', '.mp3')
+
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+# Source of the files in each worker process
+worker_source = None
+
+
+class LocalSource:
+    """
+    Audio files below a local directory
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def list(self):
+        names = []
+        for folder, _, files in os.walk(self.root):
+            for file_name in files:
+                if file_name.lower().endswith(AUDIO_EXTENSIONS):
+                    names.append(os.path.relpath(os.path.join(folder, file_name), self.root))
+        return sorted(names)
+
+    def open(self, name):
+        with open(os.path.join(self.root, name), 'rb') as audio:
+            return io.BytesIO(audio.read())
+
+
+class S3Source:
+    """
+    Audio objects below an S3 prefix, optionally on a local S3 compatible endpoint
+    """
+
+    def __init__(self, bucket, prefix, endpoint_url=None):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.endpoint_url = endpoint_url
+        self.client = get_client('s3', endpoint_url=endpoint_url)
+
+    def list(self):
+        names = []
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for s3_object in page.get('Contents', []):
+                if s3_object['Key'].lower().endswith(AUDIO_EXTENSIONS):
+                    names.append(s3_object['Key'])
+        return names
+
+    def open(self, name):
+        return app.download_to_memory_file_object(self.bucket, name, client=self.client)
+
+
+def make_source(location, endpoint_url=None):
+    """
+    Build the source for a local directory or an s3://bucket/prefix location
+
+    Args:
+        location (str): Directory or S3 URI
+        endpoint_url (str, optional): S3 endpoint, e.g. a local stand-in. Defaults to None.
+
+    Returns:
+        LocalSource or S3Source
+    """
+    if location.startswith('s3://'):
+        bucket, _, prefix = location[len('s3://'):].partition('/')
+        return S3Source(bucket, prefix, endpoint_url)
+    return LocalSource(location)
+
+
+def init_worker(location, endpoint_url):
+    global worker_source
+    worker_source = make_source(location, endpoint_url)
+
+
+def process_file(name, output_dir, notify):
+    """
+    Run one file through the same windowing and classification path as the Lambda
+
+    Args:
+        name (str): File name relative to the source
+        output_dir (str): Directory to write timelines into, or None
+        notify (bool): Send SNS notifications for detections
+
+    Returns:
+        dict: name, audio_seconds, windows and detections per model
+    """
+    data = worker_source.open(name)
+    audio_seconds = libr.get_duration(path=data)
+    data.seek(0)
+
+    clipset = app.stream_clipset(data) if app.LOW_MEMORY else app.build_clipset(data)
+    results = []
+    for index, (offset, confidences) in enumerate(app.classify_clipset(clipset)):
+        if notify:
+            app.report_event(index, offset, confidences, name)
+        results.append((offset, confidences))
+
+    detections = {}
+    for position, model in enumerate(app.MODELS):
+        model_timeline = [(offset, confidences[position]) for offset, confidences in results]
+        detections[model['name']] = sum(1 for _, confidence in model_timeline
+                                        if confidence >= model['min_confidence'])
+        if output_dir is not None:
+            model_name = model['name'] if len(app.MODELS) > 1 else None
+            timeline_path = os.path.join(output_dir, timeline_name(name, model_name))
+            os.makedirs(os.path.dirname(timeline_path), exist_ok=True)
+            with open(timeline_path, 'wb') as out:
+                out.write(timeline_to_bytes(model_timeline, app.render_settings(model)))
+
+    return {'name': name, 'audio_seconds': audio_seconds, 'windows': len(results), 'detections': detections}
+
+
+def open_progress(path):
+    """
+    Open the progress database, creating it if needed
+
+    Args:
+        path (str): SQLite file
+
+    Returns:
+        sqlite3.Connection
+    """
+    connection = sqlite3.connect(path)
+    connection.execute('CREATE TABLE IF NOT EXISTS files (name TEXT PRIMARY KEY, status TEXT NOT NULL, '
+                       'audio_seconds REAL, windows INTEGER, detections TEXT, error TEXT, finished REAL)')
+    connection.commit()
+    return connection
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the detector over a directory or S3 prefix of recordings')
+    parser.add_argument('location', help='Local directory or s3://bucket/prefix')
+    parser.add_argument('--progress-db', default='backfill.db', help='SQLite file used to resume')
+    parser.add_argument('--output', help='Directory to write per-file confidence timelines into')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Defaults to the number of CPUs')
+    parser.add_argument('--endpoint-url', help='S3 endpoint, e.g. a local S3 compatible stand-in')
+    parser.add_argument('--notify', action='store_true', help='Send SNS notifications for detections')
+    args = parser.parse_args()
+
+    progress = open_progress(args.progress_db)
+    done = {row[0] for row in progress.execute('SELECT name FROM files WHERE status = ?', (STATUS_DONE,))}
+    names = [name for name in make_source(args.location, args.endpoint_url).list() if name not in done]
+    print(f'{len(done)} files already done, {len(names)} to process with {args.workers} workers')
+
+    start = time.perf_counter()
+    audio_seconds = 0.0
+    processed = 0
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker,
+                             initargs=(args.location, args.endpoint_url)) as executor:
+        futures = {executor.submit(process_file, name, args.output, args.notify): name for name in names}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                result = future.result()
+            except Exception as error:
+                print(f'Failed {name}: {error}')
+                progress.execute('INSERT OR REPLACE INTO files (name, status, error, finished) VALUES (?, ?, ?, ?)',
+                                 (name, STATUS_FAILED, repr(error), time.time()))
+                progress.commit()
+                continue
+
+            progress.execute('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, NULL, ?)',
+                             (name, STATUS_DONE, result['audio_seconds'], result['windows'],
+                              json.dumps(result['detections']), time.time()))
+            progress.commit()
+
+            processed += 1
+            audio_seconds += result['audio_seconds']
+            elapsed = time.perf_counter() - start
+            print(f"[{processed}/{len(names)}] {name} detections={result['detections']} "
+                  f'throughput={audio_seconds / elapsed:.1f} audio-hours/hour')
+
+    elapsed = time.perf_counter() - start
+    if processed:
+        print(f'Processed {processed} files, {audio_seconds / 3600:.2f} audio hours in {elapsed:.0f} s '
+              f'({audio_seconds / elapsed:.1f} audio-hours/hour)')
+
+
+if __name__ == '__main__':
+    main()
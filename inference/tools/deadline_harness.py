@@ -0,0 +1,217 @@
+"""
+Amazon Software License
+
+1. Definitions
+“Licensor” means any person or entity that distributes its Work.
+
+“Software” means the original work of authorship made available under this License.
+
+“Work” means the Software and any additions to or derivative works of the Software that are made available
+under this License.
+
+The terms “reproduce,” “reproduction,” “derivative works,” and “distribution” have the meaning as provided
+under U.S. copyright law; provided, however, that for the purposes of this License, derivative works shall
+not include works that remain separable from, or merely link (or bind by name) to the interfaces of, the Work.
+
+Works, including the Software, are “made available” under this License by including in or with the Work either
+(a) a copyright notice referencing the applicability of this License to the Work, or (b) a copy of this License.
+
+2. License Grants
+2.1 Copyright Grant. Subject to the terms and conditions of this License, each Licensor grants to you a perpetual,
+worldwide, non-exclusive, royalty-free, copyright license to reproduce, prepare derivative works of, publicly
+display, publicly perform, sublicense and distribute its Work and any resulting derivative works in any form.
+2.2 Patent Grant. Subject to the terms and conditions of this License, each Licensor grants to you a perpetual,
+worldwide, non-exclusive, royalty-free patent license to make, have made, use, sell, offer for sale, import,
+and otherwise transfer its Work, in whole or in part. The foregoing license applies only to the patent claims
+licensable by Licensor that would be infringed by Licensor’s Work (or portion thereof) individually and excluding
+any combinations with any other materials or technology.
+
+3. Limitations
+3.1 Redistribution. You may reproduce or distribute the Work only if (a) you do so under this License, (b) you include
+a complete copy of this License with your distribution, and (c) you retain without modification any copyright, patent,
+trademark, or attribution notices that are present in the Work.
+3.2 Derivative Works. You may specify that additional or different terms apply to the use, reproduction, and distribution
+of your derivative works of the Work (“Your Terms”) only if (a) Your Terms provide that the use limitation in Section 3.3
+applies to your derivative works, and (b) you identify the specific derivative works that are subject to Your Terms.
+Notwithstanding Your Terms, this License (including the redistribution requirements in Section 3.1) will continue to
+apply to the Work itself.
+3.3 Use Limitation. The Work and any derivative works thereof only may be used or intended for use with the web services,
+computing platforms or applications provided by Amazon.com, Inc. or its affiliates, including Amazon Web Services, Inc.
+3.4 Patent Claims. If you bring or threaten to bring a patent claim against any Licensor (including any claim,
+cross-claim or counterclaim in a lawsuit) to enforce any patents that you allege are infringed by any Work, then your
+rights under this License from such Licensor (including the grants in Sections 2.1 and 2.2) will terminate immediately.
+3.5 Trademarks. This License does not grant any rights to use any Licensor’s or its affiliates’ names, logos, or
+trademarks, except as necessary to reproduce the notices described in this License.
+3.6 Termination. If you violate any term of this License, then your rights under this License (including the grants
+in Sections 2.1 and 2.2) will terminate immediately.
+
+4. Disclaimer of Warranty.
+THE WORK IS PROVIDED “AS IS” WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING WARRANTIES
+OR CONDITIONS OF M ERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, TITLE OR NON-INFRINGEMENT. YOU BEAR THE RISK OF
+UNDERTAKING ANY ACTIVITIES UNDER THIS LICENSE. SOME STATES’ CONSUMER LAWS DO NOT ALLOW EXCLUSION OF AN IMPLIED WARRANTY,
+SO THIS DISCLAIMER MAY NOT APPLY TO YOU.
+
+5. Limitation of Liability.
+EXCEPT AS PROHIBITED BY APPLICABLE LAW, IN NO EVENT AND UNDER NO LEGAL THEORY, WHETHER IN TORT (INCLUDING NEGLIGENCE),
+CONTRACT, OR OTHERWISE SHALL ANY LICENSOR BE LIABLE TO YOU FOR DAMAGES, INCLUDING ANY DIRECT, INDIRECT, SPECIAL,
+INCIDENTAL, OR CONSEQUENTIAL DAMAGES ARISING OUT OF OR RELATED TO THIS LICENSE, THE USE OR INABILITY TO USE THE WORK
+(INCLUDING BUT NOT LIMITED TO LOSS OF GOODWILL, BUSINESS INTERRUPTION, LOST PROFITS OR DATA, COMPUTER FAILURE OR
+MALFUNCTION, OR ANY OTHER COMM ERCIAL DAMAGES OR LOSSES), EVEN IF THE LICENSOR HAS BEEN ADVISED OF THE POSSIBILITY
+OF SUCH DAMAGES.
+
+Effective Date – April 18, 2008 © 2008 Amazon.com, Inc. or its affiliates. All rights reserved.
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+FUNCTION_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'functions', 'find-sounds')
+sys.path.insert(0, FUNCTION_PATH)
+
+LOCAL_BUCKET = 'local'
+
+
+class SimulatedContext:
+    """
+    Lambda context whose remaining time counts down from a fixed budget
+    """
+
+    def __init__(self, budget):
+        self.deadline = time.monotonic() + budget
+        self.invoked_function_arn = 'arn:aws:lambda:local:000000000000:function:find-sounds'
+
+    def get_remaining_time_in_millis(self):
+        return max(int((self.deadline - time.monotonic()) * 1000), 0)
+
+
+def s3_event(paths):
+    """
+    S3 event with one record per local file
+
+    Args:
+        paths (list[str]): Audio files
+
+    Returns:
+        dictionary: S3 event information
+    """
+    return {'Records': [{'s3': {'bucket': {'name': LOCAL_BUCKET},
+                                'object': {'key': path, 'eTag': f'{os.path.getsize(path)}-{os.path.getmtime(path)}'}}}
+                        for path in paths]}
+
+
+def install_stand_ins(app, window_delay, use_rekognition):
+    """
+    Replace the AWS calls of the Lambda with local stand-ins
+
+    Args:
+        app (module): The Lambda module
+        window_delay (float): Seconds the stand-in classifier takes per window
+        use_rekognition (bool): Keep the Rekognition models instead of the stand-in classifier
+
+    Returns:
+        dictionary: Lists the stand-ins append saved timelines, sent events and continuations to
+    """
+    captured = {'timelines': {}, 'events': [], 'continuations': []}
+
+    def download(bucketname, key, client=None):
+        with open(key, 'rb') as audio:
+            return io.BytesIO(audio.read())
+
+    def classify(image_buffer, models):
+        time.sleep(window_delay)
+        # deterministic confidence from the image content
+        return tuple((len(image_buffer.getvalue()) * (position + 1) % 1000) / 1000 for position in range(len(models)))
+
+    def save(bucketname, key, timeline, settings, model_name=None):
+        captured['timelines'][(key, model_name)] = timeline
+
+    app.download_to_memory_file_object = download
+    app.save_timeline = save
+    app.send_event = lambda confidence, start, end, file, model: captured['events'].append((file, start, model['name']))
+    app.request_continuation = lambda event, context: captured['continuations'].append(event)
+    if not use_rekognition:
+        app.classify_with_models = classify
+    return captured
+
+
+def run_with_budget(app, captured, paths, budget):
+    """
+    Process files with invocations limited to a budget, following continuations
+
+    Args:
+        app (module): The Lambda module with stand-ins installed
+        captured (dictionary): Output of install_stand_ins
+        paths (list[str]): Audio files
+        budget (float): Seconds available to each invocation
+
+    Returns:
+        int: Number of invocations
+    """
+    pending = [s3_event(paths)]
+    invocations = 0
+    while pending:
+        event = pending.pop(0)
+        invocations += 1
+        result = app.lambda_handler(event, SimulatedContext(budget))
+        print(f'Invocation {invocations}: {result}')
+        pending.extend(captured['continuations'])
+        captured['continuations'].clear()
+    return invocations
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the Lambda locally under simulated time budgets')
+    parser.add_argument('paths', nargs='+', help='Local audio files')
+    parser.add_argument('--budget', type=float, nargs='+', default=[5.0, 15.0],
+                        help='Seconds available to each invocation, one run per budget')
+    parser.add_argument('--margin', type=float, default=1.0, help='DEADLINE_MARGIN in seconds')
+    parser.add_argument('--window-delay', type=float, default=0.2, help='Seconds the stand-in classifier takes')
+    parser.add_argument('--rekognition', action='store_true', help='Classify with the configured Rekognition models')
+    parser.add_argument('--json', help='Write the results to this file')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    os.environ['DEADLINE_MARGIN'] = str(args.margin)
+    os.environ['CHECKPOINT_DB'] = os.path.join(work_dir, 'checkpoints.db')
+    os.environ.pop('IDEMPOTENCY_TABLE', None)
+    # clients are created at import, the stand-ins keep them from being used
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    import app
+    from idempotency import SQLiteIdempotencyStore
+    captured = install_stand_ins(app, args.window_delay, args.rekognition)
+
+    # reference run without a time limit
+    for path in args.paths:
+        app.check_audio_for_event(LOCAL_BUCKET, path)
+    reference_timelines = dict(captured['timelines'])
+    reference_events = sorted(captured['events'])
+
+    results = []
+    for budget in args.budget:
+        # fresh idempotency records for every run, as the files are processed again
+        app.idempotency_store = SQLiteIdempotencyStore(os.path.join(work_dir, f'idempotency-{budget}.db'))
+        captured['timelines'].clear()
+        captured['events'].clear()
+        start = time.perf_counter()
+        invocations = run_with_budget(app, captured, args.paths, budget)
+        result = {'budget_s': budget, 'invocations': invocations, 'seconds': time.perf_counter() - start,
+                  'timelines_match': captured['timelines'] == reference_timelines,
+                  'events_match': sorted(captured['events']) == reference_events}
+        results.append(result)
+        print(f"budget {budget:6.1f} s: {invocations} invocations, timelines "
+              f"{'match' if result['timelines_match'] else 'DIFFER'}, events "
+              f"{'match' if result['events_match'] else 'DIFFER'}")
+
+    if args.json:
+        with open(args.json, 'w') as out:
+            json.dump(results, out, indent=2)
+    sys.exit(0 if all(result['timelines_match'] and result['events_match'] for result in results) else 1)
+
+
+if __name__ == '__main__':
+    main()
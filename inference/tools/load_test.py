@@ -0,0 +1,430 @@
+"""
+Amazon Software License
+
+1. Definitions
+“Licensor” means any person or entity that distributes its Work.
+
+“Software” means the original work of authorship made available under this License.
+
+“Work” means the Software and any additions to or derivative works of the Software that are made available
+under this License.
+
+The terms “reproduce,” “reproduction,” “derivative works,” and “distribution” have the meaning as provided
+under U.S. copyright law; provided, however, that for the purposes of this License, derivative works shall
+not include works that remain separable from, or merely link (or bind by name) to the interfaces of, the Work.
+
+Works, including the Software, are “made available” under this License by including in or with the Work either
+(a) a copyright notice referencing the applicability of this License to the Work, or (b) a copy of this License.
+
+2. License Grants
+2.1 Copyright Grant. Subject to the terms and conditions of this License, each Licensor grants to you a perpetual,
+worldwide, non-exclusive, royalty-free, copyright license to reproduce, prepare derivative works of, publicly
+display, publicly perform, sublicense and distribute its Work and any resulting derivative works in any form.
+2.2 Patent Grant. Subject to the terms and conditions of this License, each Licensor grants to you a perpetual,
+worldwide, non-exclusive, royalty-free patent license to make, have made, use, sell, offer for sale, import,
+and otherwise transfer its Work, in whole or in part. The foregoing license applies only to the patent claims
+licensable by Licensor that would be infringed by Licensor’s Work (or portion thereof) individually and excluding
+any combinations with any other materials or technology.
+
+3. Limitations
+3.1 Redistribution. You may reproduce or distribute the Work only if (a) you do so under this License, (b) you include
+a complete copy of this License with your distribution, and (c) you retain without modification any copyright, patent,
+trademark, or attribution notices that are present in the Work.
+3.2 Derivative Works. You may specify that additional or different terms apply to the use, reproduction, and distribution
+of your derivative works of the Work (“Your Terms”) only if (a) Your Terms provide that the use limitation in Section 3.3
+applies to your derivative works, and (b) you identify the specific derivative works that are subject to Your Terms.
+Notwithstanding Your Terms, this License (including the redistribution requirements in Section 3.1) will continue to
+apply to the Work itself.
+3.3 Use Limitation. The Work and any derivative works thereof only may be used or intended for use with the web services,
+computing platforms or applications provided by Amazon.com, Inc. or its affiliates, including Amazon Web Services, Inc.
+3.4 Patent Claims. If you bring or threaten to bring a patent claim against any Licensor (including any claim,
+cross-claim or counterclaim in a lawsuit) to enforce any patents that you allege are infringed by any Work, then your
+rights under this License from such Licensor (including the grants in Sections 2.1 and 2.2) will terminate immediately.
+3.5 Trademarks. This License does not grant any rights to use any Licensor’s or its affiliates’ names, logos, or
+trademarks, except as necessary to reproduce the notices described in this License.
+3.6 Termination. If you violate any term of this License, then your rights under this License (including the grants
+in Sections 2.1 and 2.2) will terminate immediately.
+
+4. Disclaimer of Warranty.
+THE WORK IS PROVIDED “AS IS” WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING WARRANTIES
+OR CONDITIONS OF M ERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, TITLE OR NON-INFRINGEMENT. YOU BEAR THE RISK OF
+UNDERTAKING ANY ACTIVITIES UNDER THIS LICENSE. SOME STATES’ CONSUMER LAWS DO NOT ALLOW EXCLUSION OF AN IMPLIED WARRANTY,
+SO THIS DISCLAIMER MAY NOT APPLY TO YOU.
+
+5. Limitation of Liability.
+EXCEPT AS PROHIBITED BY APPLICABLE LAW, IN NO EVENT AND UNDER NO LEGAL THEORY, WHETHER IN TORT (INCLUDING NEGLIGENCE),
+CONTRACT, OR OTHERWISE SHALL ANY LICENSOR BE LIABLE TO YOU FOR DAMAGES, INCLUDING ANY DIRECT, INDIRECT, SPECIAL,
+INCIDENTAL, OR CONSEQUENTIAL DAMAGES ARISING OUT OF OR RELATED TO THIS LICENSE, THE USE OR INABILITY TO USE THE WORK
+(INCLUDING BUT NOT LIMITED TO LOSS OF GOODWILL, BUSINESS INTERRUPTION, LOST PROFITS OR DATA, COMPUTER FAILURE OR
+MALFUNCTION, OR ANY OTHER COMM ERCIAL DAMAGES OR LOSSES), EVEN IF THE LICENSOR HAS BEEN ADVISED OF THE POSSIBILITY
+OF SUCH DAMAGES.
+
+Effective Date – April 18, 2008 © 2008 Amazon.com, Inc. or its affiliates. All rights reserved.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import struct
+import sys
+import tempfile
+import time
+from multiprocessing.connection import wait
+import numpy as np
+import soundfile as sf
+from botocore.exceptions import ClientError
+
+FUNCTION_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'functions', 'find-sounds')
+sys.path.insert(0, FUNCTION_PATH)
+
+LOCAL_BUCKET = 'load-test'
+# Rate of the synthesized recordings
+FILE_SAMPLE_RATE = 48000
+# Band the synthesized alarm is in, and the share of a window's energy in it that counts as an alarm
+ALARM_BAND = (2800, 3400)
+ALARM_SCORE = 0.2
+# Length of the synthesized alarm in seconds
+ALARM_DURATION = 3
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if len(values) else float('nan')
+
+
+class TokenBucket:
+    """
+    Request rate limit shared by all simulated executions
+    """
+
+    def __init__(self, context, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.lock = context.Lock()
+        self.tokens = context.Value('d', burst, lock=False)
+        self.updated = context.Value('d', time.monotonic(), lock=False)
+        self.calls = context.Value('i', 0, lock=False)
+        self.throttles = context.Value('i', 0, lock=False)
+
+    def take(self):
+        """
+        Returns:
+            bool: False if the request is throttled
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens.value = min(self.burst, self.tokens.value + (now - self.updated.value) * self.rate)
+            self.updated.value = now
+            self.calls.value += 1
+            if self.tokens.value >= 1:
+                self.tokens.value -= 1
+                return True
+            self.throttles.value += 1
+            return False
+
+
+class StandInRekognition:
+    """
+    detect_custom_labels with a latency distribution and a TPS limit
+
+    The confidence is read from the score the stand-in renderer appends to the image.
+    """
+
+    def __init__(self, bucket, latency, labels, seed):
+        self.bucket = bucket
+        self.latency = latency
+        self.labels = labels
+        self.rng = np.random.default_rng(seed)
+
+    def detect_custom_labels(self, Image, MinConfidence, ProjectVersionArn):  # noqa: N803
+        time.sleep(self.rng.lognormal(np.log(self.latency), 0.3))
+        if not self.bucket.take():
+            raise ClientError({'Error': {'Code': 'ThrottlingException', 'Message': 'Rate exceeded'}},
+                              'DetectCustomLabels')
+        score = struct.unpack('<f', Image['Bytes'][-4:])[0]
+        confidence = 99.0 if score > ALARM_SCORE else 100 * score
+        return {'CustomLabels': [{'Name': label, 'Confidence': confidence} for label in self.labels]}
+
+
+class StandInSNS:
+    """
+    Records the time each notification is published, by audio file key
+    """
+
+    def __init__(self):
+        self.published = []
+
+    def publish(self, Message, MessageAttributes, TopicArn):  # noqa: N803
+        key = Message.split('\n')[0].split(' in ', 1)[1]
+        self.published.append((key, time.time()))
+        return {'MessageId': str(len(self.published))}
+
+
+def alarm_score(clip):
+    """
+    Share of the clip's energy in ALARM_BAND
+
+    Args:
+        clip (numpy.Array): Samples at the function's sample rate
+
+    Returns:
+        float: 0 .. 1
+    """
+    import app
+    power = np.abs(np.fft.rfft(clip)) ** 2
+    freqs = np.fft.rfftfreq(len(clip), 1 / app.SAMPLE_RATE)
+    band = (freqs >= ALARM_BAND[0]) & (freqs <= ALARM_BAND[1])
+    return float(power[band].sum() / max(power.sum(), 1e-12))
+
+
+def synthesize_files(work_dir, count, median, sigma, max_duration, alarm_ratio, rng):
+    """
+    Write recordings with lognormally distributed durations, a share of them holding an alarm
+
+    Args:
+        work_dir (str): Directory to write the files to
+        count (int): Number of files
+        median (float): Median duration in seconds
+        sigma (float): Sigma of the log duration
+        max_duration (float): Longest duration in seconds
+        alarm_ratio (float): Share of the files holding an alarm
+        rng (numpy.random.Generator): Random source
+
+    Returns:
+        list[dict]: name, duration and alarm flag of every file
+    """
+    files = []
+    num_alarms = int(round(count * alarm_ratio))
+    for index in range(count):
+        duration = float(np.clip(rng.lognormal(np.log(median), sigma), ALARM_DURATION, max_duration))
+        samples = 0.05 * rng.standard_normal(int(duration * FILE_SAMPLE_RATE))
+        alarm = index < num_alarms
+        if alarm:
+            t = np.arange(ALARM_DURATION * FILE_SAMPLE_RATE) / FILE_SAMPLE_RATE
+            beep = 0.3 * np.sin(2 * np.pi * np.mean(ALARM_BAND) * t) * (np.sin(2 * np.pi * 2 * t) > 0)
+            start = rng.integers(0, len(samples) - len(beep) + 1)
+            samples[start:start + len(beep)] += beep
+        name = f'recording_{index:03d}.wav'
+        sf.write(os.path.join(work_dir, name), samples.astype(np.float32), FILE_SAMPLE_RATE, subtype='PCM_16')
+        files.append({'name': name, 'duration': duration, 'alarm': alarm})
+    return files
+
+
+def install_stand_ins(app, work_dir, bucket, args):
+    """
+    Replace S3, Rekognition, SNS and optionally the renderer with local stand-ins
+
+    Args:
+        app (module): The Lambda module
+        work_dir (str): Directory holding the synthesized files
+        bucket (TokenBucket): Rekognition rate limit
+        args (argparse.Namespace): Command line options
+
+    Returns:
+        StandInSNS: Records the notifications
+    """
+    import rekognition_wrapper
+    import sns_wrapper
+
+    def download(bucketname, key, client=None):
+        with open(os.path.join(work_dir, key.split('/', 1)[1]), 'rb') as audio:
+            return app.io.BytesIO(audio.read())
+
+    render = app.render_clip
+
+    def render_clip(clip):
+        # the real image when asked for, otherwise the modelled render time, with the alarm score appended
+        if args.real_render:
+            image = render(clip)
+        else:
+            time.sleep(args.render_ms / 1000)
+            image = b'PNG'
+        return image + struct.pack('<f', alarm_score(clip))
+
+    sns = StandInSNS()
+    app.download_to_memory_file_object = download
+    app.render_clip = render_clip
+    sns_wrapper.SNS_CLIENT = sns
+    rekognition_wrapper.CLIENT = StandInRekognition(bucket, args.rek_latency_ms / 1000,
+                                                    [model['label'] for model in app.MODELS], args.seed)
+    return sns
+
+
+def execution(connection, app, sns, verbose):
+    """
+    One simulated concurrent execution, handling an event at a time
+
+    Args:
+        connection (multiprocessing.connection.Connection): Pipe to the dispatcher
+        app (module): The Lambda module with stand-ins installed
+        sns (StandInSNS): Notification recorder
+        verbose (bool): Keep the handler's output
+    """
+    import rekognition_wrapper
+    if not verbose:
+        sys.stdout = open(os.devnull, 'w')
+    # a separate random stream per execution for the Rekognition latencies
+    rekognition_wrapper.CLIENT.rng = np.random.default_rng(os.getpid())
+    while True:
+        try:
+            event = connection.recv()
+        except EOFError:
+            break
+        sns.published.clear()
+        error = None
+        try:
+            app.lambda_handler(event, None)
+        except Exception as exception:  # noqa: B902
+            error = repr(exception)
+        connection.send({'end': time.time(), 'published': list(sns.published), 'error': error})
+
+
+def run_load(app, sns, bucket, files, rate, args, rng):
+    """
+    Replay a Poisson stream of ObjectCreated events against a pool of executions
+
+    Args:
+        app (module): The Lambda module with stand-ins installed
+        sns (StandInSNS): Notification recorder
+        bucket (TokenBucket): Rekognition rate limit
+        files (list[dict]): Synthesized files
+        rate (float): Events per second
+        args (argparse.Namespace): Command line options
+        rng (numpy.random.Generator): Random source
+
+    Returns:
+        dict: Throughput, delays, detection latencies and throttle rate of the run
+    """
+    alarm_files = [file for file in files if file['alarm']]
+    quiet_files = [file for file in files if not file['alarm']]
+    arrivals = np.cumsum(rng.exponential(1 / rate, int(rate * args.seconds) + 1))
+    arrivals = arrivals[arrivals < args.seconds]
+    events = []
+    for index, offset in enumerate(arrivals):
+        pool = alarm_files if (rng.random() < args.alarm_ratio and alarm_files) or not quiet_files else quiet_files
+        file = pool[rng.integers(len(pool))]
+        events.append({'id': index, 'offset': offset, 'file': file, 'key': f"{index:06d}/{file['name']}"})
+
+    with bucket.lock:
+        bucket.tokens.value, bucket.updated.value = bucket.burst, time.monotonic()
+        bucket.calls.value, bucket.throttles.value = 0, 0
+
+    context = multiprocessing.get_context('fork')
+    idle = []
+    for _ in range(args.concurrency):
+        parent_end, worker_end = context.Pipe()
+        context.Process(target=execution, args=(worker_end, app, sns, args.verbose), daemon=True).start()
+        worker_end.close()
+        idle.append(parent_end)
+
+    start = time.time()
+    queue = []
+    busy = {}
+    pending = list(events)
+    max_queue = 0
+    while pending or queue or busy:
+        now = time.time() - start
+        while pending and pending[0]['offset'] <= now:
+            queue.append(pending.pop(0))
+        max_queue = max(max_queue, len(queue))
+        while queue and idle:
+            event = queue.pop(0)
+            event['dispatched'] = time.time() - start
+            connection = idle.pop()
+            busy[connection] = event
+            connection.send({'Records': [{'s3': {'bucket': {'name': LOCAL_BUCKET},
+                                                 'object': {'key': event['key'], 'eTag': str(event['id'])}}}]})
+        timeout = max(pending[0]['offset'] - now, 0) if pending else None
+        if not busy:
+            time.sleep(timeout or 0)
+            continue
+        for connection in wait(list(busy), timeout=timeout):
+            result = connection.recv()
+            event = busy.pop(connection)
+            event['end'] = result['end'] - start
+            event['error'] = result['error']
+            published = [stamp - start for key, stamp in result['published'] if key == event['key']]
+            event['detected'] = min(published) if published else None
+            idle.append(connection)
+    elapsed = time.time() - start
+    for connection in idle:
+        connection.close()
+
+    audio_seconds = sum(event['file']['duration'] for event in events)
+    queue_delays = [event['dispatched'] - event['offset'] for event in events]
+    processing = [event['end'] - event['dispatched'] for event in events]
+    detections = [event['detected'] - event['offset'] for event in events
+                  if event['file']['alarm'] and event['detected'] is not None]
+    return {'rate': rate,
+            'events': len(events),
+            'errors': sum(event['error'] is not None for event in events),
+            'elapsed_s': elapsed,
+            'throughput_files_per_s': len(events) / elapsed,
+            'audio_hours_per_hour': audio_seconds / elapsed,
+            'max_queue': max_queue,
+            'queue_delay_p50_s': percentile(queue_delays, 50),
+            'queue_delay_p99_s': percentile(queue_delays, 99),
+            'processing_p50_s': percentile(processing, 50),
+            'processing_p99_s': percentile(processing, 99),
+            'detection_latency_p50_s': percentile(detections, 50),
+            'detection_latency_p99_s': percentile(detections, 99),
+            'missed_alarms': sum(event['file']['alarm'] and event['detected'] is None for event in events),
+            'false_alarms': sum(not event['file']['alarm'] and event['detected'] is not None for event in events),
+            'rekognition_calls': bucket.calls.value,
+            'rekognition_tps': bucket.calls.value / elapsed,
+            'throttle_rate': bucket.throttles.value / max(bucket.calls.value, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay synthetic S3 ObjectCreated events against lambda_handler')
+    parser.add_argument('--rate', type=float, nargs='+', default=[0.5, 1, 2], help='Events per second, one run each')
+    parser.add_argument('--seconds', type=float, default=60, help='Length of the arrival stream of each run')
+    parser.add_argument('--concurrency', type=int, default=4, help='Simulated concurrent executions')
+    parser.add_argument('--files', type=int, default=12, help='Distinct recordings synthesized')
+    parser.add_argument('--median-duration', type=float, default=30, help='Median recording length in seconds')
+    parser.add_argument('--duration-sigma', type=float, default=0.8, help='Sigma of the log recording length')
+    parser.add_argument('--max-duration', type=float, default=300, help='Longest recording in seconds')
+    parser.add_argument('--alarm-ratio', type=float, default=0.2, help='Share of the events holding an alarm')
+    parser.add_argument('--rek-tps', type=float, default=20, help='Rekognition requests per second before throttling')
+    parser.add_argument('--rek-burst', type=float, default=20, help='Rekognition requests allowed in a burst')
+    parser.add_argument('--rek-latency-ms', type=float, default=150, help='Median Rekognition latency')
+    parser.add_argument('--render-ms', type=float, default=150, help='Modelled time to render a window')
+    parser.add_argument('--real-render', action='store_true', help='Render the real spectrograms')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--verbose', action='store_true', help="Show the handler's output")
+    parser.add_argument('--json', help='Write the results to this file')
+    args = parser.parse_args()
+
+    # a stand-in for every AWS service the handler uses
+    for name in ['IDEMPOTENCY_TABLE', 'IDEMPOTENCY_DB', 'CHECKPOINT_DB']:
+        os.environ.pop(name, None)
+    os.environ.update({'SAVE_TIMELINE': 'false', 'CHECKPOINT': 'false', 'PROFILE': 'off'})
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    import app
+
+    rng = np.random.default_rng(args.seed)
+    context = multiprocessing.get_context('fork')
+    bucket = TokenBucket(context, args.rek_tps, args.rek_burst)
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        files = synthesize_files(work_dir, args.files, args.median_duration, args.duration_sigma,
+                                 args.max_duration, args.alarm_ratio, rng)
+        sns = install_stand_ins(app, work_dir, bucket, args)
+        print(f"{'rate':>5s} {'events':>6s} {'files/s':>7s} {'audio h/h':>9s} {'queue p50':>9s} {'queue p99':>9s} "
+              f"{'detect p50':>10s} {'detect p99':>10s} {'rek TPS':>7s} {'throttled':>9s} {'missed':>6s} {'errors':>6s}")
+        for rate in args.rate:
+            result = run_load(app, sns, bucket, files, rate, args, rng)
+            results.append(result)
+            print(f"{rate:5.2f} {result['events']:6d} {result['throughput_files_per_s']:7.2f} "
+                  f"{result['audio_hours_per_hour']:9.1f} {result['queue_delay_p50_s']:9.2f} "
+                  f"{result['queue_delay_p99_s']:9.2f} {result['detection_latency_p50_s']:10.2f} "
+                  f"{result['detection_latency_p99_s']:10.2f} {result['rekognition_tps']:7.1f} "
+                  f"{result['throttle_rate']:9.1%} {result['missed_alarms']:6d} {result['errors']:6d}")
+
+    if args.json:
+        with open(args.json, 'w') as out:
+            json.dump({'options': vars(args), 'runs': results}, out, indent=2)
+
+
+if __name__ == '__main__':
+    main()
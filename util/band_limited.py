@@ -0,0 +1,173 @@
+"""
+Amazon Software License
+
+1. Definitions
+“Licensor” means any person or entity that distributes its Work.
+
+“Software” means the original work of authorship made available under this License.
+
+“Work” means the Software and any additions to or derivative works of the Software that are made available
+under this License.
+
+The terms “reproduce,” “reproduction,” “derivative works,” and “distribution” have the meaning as provided
+under U.S. copyright law; provided, however, that for the purposes of this License, derivative works shall
+not include works that remain separable from, or merely link (or bind by name) to the interfaces of, the Work.
+
+Works, including the Software, are “made available” under this License by including in or with the Work either
+(a) a copyright notice referencing the applicability of this License to the Work, or (b) a copy of this License.
+
+2. License Grants
+2.1 Copyright Grant. Subject to the terms and conditions of this License, each Licensor grants to you a perpetual,
+worldwide, non-exclusive, royalty-free, copyright license to reproduce, prepare derivative works of, publicly
+display, publicly perform, sublicense and distribute its Work and any resulting derivative works in any form.
+2.2 Patent Grant. Subject to the terms and conditions of this License, each Licensor grants to you a perpetual,
+worldwide, non-exclusive, royalty-free patent license to make, have made, use, sell, offer for sale, import,
+and otherwise transfer its Work, in whole or in part. The foregoing license applies only to the patent claims
+licensable by Licensor that would be infringed by Licensor’s Work (or portion thereof) individually and excluding
+any combinations with any other materials or technology.
+
+3. Limitations
+3.1 Redistribution. You may reproduce or distribute the Work only if (a) you do so under this License, (b) you include
+a complete copy of this License with your distribution, and (c) you retain without modification any copyright, patent,
+trademark, or attribution notices that are present in the Work.
+3.2 Derivative Works. You may specify that additional or different terms apply to the use, reproduction, and distribution
+of your derivative works of the Work (“Your Terms”) only if (a) Your Terms provide that the use limitation in Section 3.3
+applies to your derivative works, and (b) you identify the specific derivative works that are subject to Your Terms.
+Notwithstanding Your Terms, this License (including the redistribution requirements in Section 3.1) will continue to
+apply to the Work itself.
+3.3 Use Limitation. The Work and any derivative works thereof only may be used or intended for use with the web services,
+computing platforms or applications provided by Amazon.com, Inc. or its affiliates, including Amazon Web Services, Inc.
+3.4 Patent Claims. If you bring or threaten to bring a patent claim against any Licensor (including any claim,
+cross-claim or counterclaim in a lawsuit) to enforce any patents that you allege are infringed by any Work, then your
+rights under this License from such Licensor (including the grants in Sections 2.1 and 2.2) will terminate immediately.
+3.5 Trademarks. This License does not grant any rights to use any Licensor’s or its affiliates’ names, logos, or
+trademarks, except as necessary to reproduce the notices described in this License.
+3.6 Termination. If you violate any term of this License, then your rights under this License (including the grants
+in Sections 2.1 and 2.2) will terminate immediately.
+
+4. Disclaimer of Warranty.
+THE WORK IS PROVIDED “AS IS” WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING WARRANTIES
+OR CONDITIONS OF M ERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, TITLE OR NON-INFRINGEMENT. YOU BEAR THE RISK OF
+UNDERTAKING ANY ACTIVITIES UNDER THIS LICENSE. SOME STATES’ CONSUMER LAWS DO NOT ALLOW EXCLUSION OF AN IMPLIED WARRANTY,
+SO THIS DISCLAIMER MAY NOT APPLY TO YOU.
+
+5. Limitation of Liability.
+EXCEPT AS PROHIBITED BY APPLICABLE LAW, IN NO EVENT AND UNDER NO LEGAL THEORY, WHETHER IN TORT (INCLUDING NEGLIGENCE),
+CONTRACT, OR OTHERWISE SHALL ANY LICENSOR BE LIABLE TO YOU FOR DAMAGES, INCLUDING ANY DIRECT, INDIRECT, SPECIAL,
+INCIDENTAL, OR CONSEQUENTIAL DAMAGES ARISING OUT OF OR RELATED TO THIS LICENSE, THE USE OR INABILITY TO USE THE WORK
+(INCLUDING BUT NOT LIMITED TO LOSS OF GOODWILL, BUSINESS INTERRUPTION, LOST PROFITS OR DATA, COMPUTER FAILURE OR
+MALFUNCTION, OR ANY OTHER COMM ERCIAL DAMAGES OR LOSSES), EVEN IF THE LICENSOR HAS BEEN ADVISED OF THE POSSIBILITY
+OF SUCH DAMAGES.
+
+Effective Date – April 18, 2008 © 2008 Amazon.com, Inc. or its affiliates. All rights reserved.
+"""
+
+import numpy as np
+import soxr
+from librosa import stft
+from librosa import filters
+from librosa import hz_to_mel
+
+# Spectrogram types computed from audio decimated to just above twice the top of freq_range
+BAND_LIMITED_TYPES = ['Std-band', 'Mel-band']
+# Ratio of the decimated Nyquist frequency to the top of freq_range, room for the anti-aliasing filter
+BAND_HEADROOM = 1.25
+# Sample rate, FFT size and mel bands of the full band types, whose resolution the band types keep
+REFERENCE_RATE = 48000
+REFERENCE_N_FFT = 2048
+REFERENCE_N_MELS = 128
+
+# Mel filterbanks built so far, by sample rate, FFT size and frequency range
+filterbank_cache = dict()
+
+
+def band_rate(freq_range, sr=REFERENCE_RATE):
+    """
+    Lowest rate, an integer fraction of sr, that keeps freq_range below its Nyquist frequency with headroom
+
+    Args:
+        freq_range (list): min .. max frequency
+        sr (int, optional): Rate of the source audio. Defaults to REFERENCE_RATE.
+
+    Returns:
+        int: Decimated sample rate, e.g. 12000 for 48000 and a 4 kHz limit
+    """
+    factor = max(int(sr // (2 * BAND_HEADROOM * freq_range[1])), 1)
+    return int(round(sr / factor))
+
+
+def decimate(wavdata, sr, freq_range):
+    """
+    Low-pass filter and decimate audio to band_rate
+
+    Args:
+        wavdata (NumPy.array): Audio, a single clip or a 2D batch of equal-length clips
+        sr (int): Sample rate of wavdata
+        freq_range (list): min .. max frequency to keep
+
+    Returns:
+        tuple(NumPy.array, int): Decimated audio and its sample rate, wavdata itself if already decimated
+    """
+    target = band_rate(freq_range, sr)
+    if target >= sr:
+        return wavdata, sr
+    # soxr takes (frames, channels), its filter removes everything above the new Nyquist frequency
+    decimated = soxr.resample(np.ascontiguousarray(wavdata.T), sr, target, quality='HQ')
+    return decimated.T, target
+
+
+def band_fft_size(sr):
+    """
+    FFT size and hop length giving the reference time and frequency resolution
+
+    Args:
+        sr (int): Sample rate
+
+    Returns:
+        tuple(int, int): n_fft and hop_length
+    """
+    n_fft = 2 ** int(round(np.log2(REFERENCE_N_FFT * sr / REFERENCE_RATE)))
+    return n_fft, n_fft // 4
+
+
+def band_mel_filterbank(sr, n_fft, freq_range):
+    """
+    Mel filterbank covering freq_range only, as densely as the reference filterbank covers the full band
+
+    Args:
+        sr (int): Sample rate
+        n_fft (int): FFT size
+        freq_range (list): min .. max frequency
+
+    Returns:
+        NumPy.array: (n_mels, 1 + n_fft // 2) filterbank
+    """
+    key = (sr, n_fft, tuple(freq_range))
+    if key not in filterbank_cache:
+        mel_min, mel_max, mel_top = hz_to_mel([freq_range[0], freq_range[1], REFERENCE_RATE / 2])
+        n_mels = max(int(round(REFERENCE_N_MELS * (mel_max - mel_min) / mel_top)), 1)
+        filterbank_cache[key] = filters.mel(sr=sr, n_fft=n_fft, n_mels=n_mels,
+                                            fmin=freq_range[0], fmax=freq_range[1]).astype(np.float32)
+    return filterbank_cache[key]
+
+
+def band_spectrogram(wavdata, sr, freq_range, mel=False):
+    """
+    Spectrogram of the band in freq_range, computed at the decimated rate
+
+    Args:
+        wavdata (NumPy.array): Audio, a single clip or a 2D batch of equal-length clips
+        sr (int): Sample rate of wavdata
+        freq_range (list): min .. max frequency
+        mel (bool, optional): Mel power spectrogram instead of STFT magnitudes. Defaults to False.
+
+    Returns:
+        tuple(NumPy.array, int, int): Spectrogram (with a leading batch axis for a batch), sample rate
+            and hop length it was computed with
+    """
+    wavdata, sr = decimate(wavdata, sr, freq_range)
+    n_fft, hop_length = band_fft_size(sr)
+    S = np.abs(stft(wavdata, n_fft=n_fft, hop_length=hop_length))
+    if mel:
+        S = np.matmul(band_mel_filterbank(sr, n_fft, freq_range), S ** 2)
+    return S, sr, hop_length
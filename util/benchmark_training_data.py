@@ -0,0 +1,243 @@
+"""
+Amazon Software License
+
+1. Definitions
+“Licensor” means any person or entity that distributes its Work.
+
+“Software” means the original work of authorship made available under this License.
+
+“Work” means the Software and any additions to or derivative works of the Software that are made available
+under this License.
+
+The terms “reproduce,” “reproduction,” “derivative works,” and “distribution” have the meaning as provided
+under U.S. copyright law; provided, however, that for the purposes of this License, derivative works shall
+not include works that remain separable from, or merely link (or bind by name) to the interfaces of, the Work.
+
+Works, including the Software, are “made available” under this License by including in or with the Work either
+(a) a copyright notice referencing the applicability of this License to the Work, or (b) a copy of this License.
+
+2. License Grants
+2.1 Copyright Grant. Subject to the terms and conditions of this License, each Licensor grants to you a perpetual,
+worldwide, non-exclusive, royalty-free, copyright license to reproduce, prepare derivative works of, publicly
+display, publicly perform, sublicense and distribute its Work and any resulting derivative works in any form.
+2.2 Patent Grant. Subject to the terms and conditions of this License, each Licensor grants to you a perpetual,
+worldwide, non-exclusive, royalty-free patent license to make, have made, use, sell, offer for sale, import,
+and otherwise transfer its Work, in whole or in part. The foregoing license applies only to the patent claims
+licensable by Licensor that would be infringed by Licensor’s Work (or portion thereof) individually and excluding
+any combinations with any other materials or technology.
+
+3. Limitations
+3.1 Redistribution. You may reproduce or distribute the Work only if (a) you do so under this License, (b) you include
+a complete copy of this License with your distribution, and (c) you retain without modification any copyright, patent,
+trademark, or attribution notices that are present in the Work.
+3.2 Derivative Works. You may specify that additional or different terms apply to the use, reproduction, and distribution
+of your derivative works of the Work (“Your Terms”) only if (a) Your Terms provide that the use limitation in Section 3.3
+applies to your derivative works, and (b) you identify the specific derivative works that are subject to Your Terms.
+Notwithstanding Your Terms, this License (including the redistribution requirements in Section 3.1) will continue to
+apply to the Work itself.
+3.3 Use Limitation. The Work and any derivative works thereof only may be used or intended for use with the web services,
+computing platforms or applications provided by Amazon.com, Inc. or its affiliates, including Amazon Web Services, Inc.
+3.4 Patent Claims. If you bring or threaten to bring a patent claim against any Licensor (including any claim,
+cross-claim or counterclaim in a lawsuit) to enforce any patents that you allege are infringed by any Work, then your
+rights under this License from such Licensor (including the grants in Sections 2.1 and 2.2) will terminate immediately.
+3.5 Trademarks. This License does not grant any rights to use any Licensor’s or its affiliates’ names, logos, or
+trademarks, except as necessary to reproduce the notices described in this License.
+3.6 Termination. If you violate any term of this License, then your rights under this License (including the grants
+in Sections 2.1 and 2.2) will terminate immediately.
+
+4. Disclaimer of Warranty.
+THE WORK IS PROVIDED “AS IS” WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING WARRANTIES
+OR CONDITIONS OF M ERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, TITLE OR NON-INFRINGEMENT. YOU BEAR THE RISK OF
+UNDERTAKING ANY ACTIVITIES UNDER THIS LICENSE. SOME STATES’ CONSUMER LAWS DO NOT ALLOW EXCLUSION OF AN IMPLIED WARRANTY,
+SO THIS DISCLAIMER MAY NOT APPLY TO YOU.
+
+5. Limitation of Liability.
+EXCEPT AS PROHIBITED BY APPLICABLE LAW, IN NO EVENT AND UNDER NO LEGAL THEORY, WHETHER IN TORT (INCLUDING NEGLIGENCE),
+CONTRACT, OR OTHERWISE SHALL ANY LICENSOR BE LIABLE TO YOU FOR DAMAGES, INCLUDING ANY DIRECT, INDIRECT, SPECIAL,
+INCIDENTAL, OR CONSEQUENTIAL DAMAGES ARISING OUT OF OR RELATED TO THIS LICENSE, THE USE OR INABILITY TO USE THE WORK
+(INCLUDING BUT NOT LIMITED TO LOSS OF GOODWILL, BUSINESS INTERRUPTION, LOST PROFITS OR DATA, COMPUTER FAILURE OR
+MALFUNCTION, OR ANY OTHER COMM ERCIAL DAMAGES OR LOSSES), EVEN IF THE LICENSOR HAS BEEN ADVISED OF THE POSSIBILITY
+OF SUCH DAMAGES.
+
+Effective Date – April 18, 2008 © 2008 Amazon.com, Inc. or its affiliates. All rights reserved.
+"""
+
+import argparse
+import json
+import os
+import os.path as path
+import subprocess
+import tempfile
+import time
+import matplotlib
+import matplotlib.image
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+import numpy as np
+import soundfile as sf
+import constant_q
+import hpss
+import spectrogram_plotter
+import create_training_data as ctd
+
+# Synthetic source audio
+SOURCE_RATE = 44100
+NUM_ALARM_FILES = 4
+NUM_BACKGROUND_FILES = 6
+BACKGROUND_DURATION = 20
+
+STAGES = ['load', 'mix', 'features', 'draw', 'png']
+
+
+class StageTimer:
+    """
+    Exclusive wall clock time per stage, nested stages are subtracted from the enclosing one
+    """
+
+    def __init__(self):
+        self.totals = dict.fromkeys(STAGES, 0.0)
+        self.stack = []
+
+    def wrap(self, stage, function):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            self.stack.append(stage)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.stack.pop()
+                elapsed = time.perf_counter() - start
+                self.totals[stage] += elapsed
+                if self.stack:
+                    self.totals[self.stack[-1]] -= elapsed
+        return timed
+
+    def reset(self):
+        self.totals = dict.fromkeys(STAGES, 0.0)
+
+
+def instrument(timer):
+    """
+    Route the generator's stages through the timer
+
+    Args:
+        timer (StageTimer): Timer to accumulate into
+    """
+    ctd.load_wav_file = timer.wrap('load', ctd.load_wav_file)
+    ctd.get_random_mixed_audio = timer.wrap('mix', ctd.get_random_mixed_audio)
+    ctd.load_stft = timer.wrap('load', ctd.load_stft)
+    ctd.get_random_mixed_stft = timer.wrap('mix', ctd.get_random_mixed_stft)
+    ctd.get_batch_features = timer.wrap('features', ctd.get_batch_features)
+
+    for name in ['stft', 'melspectrogram', 'amplitude_to_db', 'power_to_db', 'reassigned_spectrogram',
+                 'harmonic_percussive']:
+        setattr(spectrogram_plotter, name, timer.wrap('features', getattr(spectrogram_plotter, name)))
+    constant_q.ConstantQ.transform = timer.wrap('features', constant_q.ConstantQ.transform)
+    constant_q.ConstantQ.chroma = timer.wrap('features', constant_q.ConstantQ.chroma)
+    hpss.running_median = timer.wrap('features', hpss.running_median)
+
+    spectrogram_plotter.specshow = timer.wrap('draw', spectrogram_plotter.specshow)
+    spectrogram_plotter.plot_reassigned = timer.wrap('draw', spectrogram_plotter.plot_reassigned)
+    FigureCanvasAgg.draw = timer.wrap('draw', FigureCanvasAgg.draw)
+    matplotlib.image.imsave = timer.wrap('png', matplotlib.image.imsave)
+
+
+def write_source_audio(work_dir):
+    """
+    Write synthetic alarm and background recordings
+
+    Args:
+        work_dir (str): Directory to create the alarms and background folders in
+
+    Returns:
+        tuple(str, str): alarm and background folders
+    """
+    rng = np.random.default_rng(0)
+    alarm_dir = path.join(work_dir, 'alarms')
+    background_dir = path.join(work_dir, 'background')
+    os.makedirs(alarm_dir)
+    os.makedirs(background_dir)
+
+    t = np.arange(ctd.SAMPLE_DURATION * SOURCE_RATE) / SOURCE_RATE
+    for index in range(NUM_ALARM_FILES):
+        # pulsed tone, like a smoke alarm
+        beep = 0.3 * np.sin(2 * np.pi * rng.uniform(2800, 3400) * t) * (np.sin(2 * np.pi * 2 * t) > 0)
+        sf.write(path.join(alarm_dir, f'alarm_{index}.wav'), beep.astype(np.float32), SOURCE_RATE)
+
+    for index in range(NUM_BACKGROUND_FILES):
+        noise = 0.05 * rng.standard_normal(BACKGROUND_DURATION * SOURCE_RATE)
+        sf.write(path.join(background_dir, f'background_{index}.wav'), noise.astype(np.float32), SOURCE_RATE)
+    return alarm_dir, background_dir
+
+
+def benchmark_type(timer, spectrogram_type, output_dir, num_images):
+    """
+    Generate images of one type for both classes and time them
+
+    Args:
+        timer (StageTimer): Instrumented timer
+        spectrogram_type (str): Spectrogram type to generate
+        output_dir (str): Folder to write the images into
+        num_images (int): Images per class
+
+    Returns:
+        dict: images, seconds, images_per_s and the time per stage
+    """
+    ctd.sample_cache.clear()
+    ctd.stft_cache.clear()
+    timer.reset()
+    start = time.perf_counter()
+    img_num = 0
+    for with_alarm in [True, False]:
+        folder = path.join(output_dir, spectrogram_type, ctd.DIR_PREFIX_WITH if with_alarm else ctd.DIR_PREFIX_WITHOUT)
+        os.makedirs(folder, exist_ok=True)
+        img_num = ctd.generate_folder_images(spectrogram_type, folder, with_alarm, num_images, img_num)
+    seconds = time.perf_counter() - start
+
+    stages = dict(timer.totals)
+    stages['other'] = seconds - sum(stages.values())
+    return {'images': img_num, 'seconds': seconds, 'images_per_s': img_num / seconds, 'stages': stages}
+
+
+def current_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Images per second and stage breakdown of create_training_data')
+    parser.add_argument('--types', nargs='+', default=ctd.SPECTROGRAM_TYPES)
+    parser.add_argument('--images', type=int, default=10, help='Images per class and type')
+    parser.add_argument('--spectral', action='store_true', help='Mix cached STFTs for the types that support it')
+    parser.add_argument('--json', help='Write the results to this file')
+    args = parser.parse_args()
+
+    matplotlib.use('Agg')
+    ctd.SPECTRAL_MIXING = args.spectral
+    timer = StageTimer()
+    instrument(timer)
+
+    results = {'commit': current_commit(), 'images_per_class': args.images, 'spectral_mixing': args.spectral,
+               'types': {}}
+    header = ''.join(f'{stage:>9s}' for stage in STAGES + ['other'])
+    print(f"{'type':12s} {'img/s':>7s}{header}")
+    with tempfile.TemporaryDirectory() as work_dir:
+        alarm_dir, background_dir = write_source_audio(work_dir)
+        ctd.load_source_file_lists(alarm_dir, background_dir)
+        for spectrogram_type in args.types:
+            result = benchmark_type(timer, spectrogram_type, path.join(work_dir, 'images'), args.images)
+            results['types'][spectrogram_type] = result
+            stages = ''.join(f'{result["stages"][stage]:9.2f}' for stage in STAGES + ['other'])
+            print(f"{spectrogram_type:12s} {result['images_per_s']:7.2f}{stages}")
+            plt.close('all')
+
+    if args.json:
+        with open(args.json, 'w') as out:
+            json.dump(results, out, indent=2)
+
+
+if __name__ == '__main__':
+    main()
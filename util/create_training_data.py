@@ -63,11 +63,15 @@ Effective Date – April 18, 2008 © 2008 Amazon.com, Inc. or its affiliates. Al
 """
 
 from spectrogram_plotter import plot_spectrogram
+from constant_q import get_constant_q
+from hpss import harmonic_percussive, harmonic_percussive_stft
+from band_limited import band_spectrogram
 import os
 import os.path as path
 import glob
 import random as rnd
 import librosa as libr
+from librosa import stft
 import numpy as np
 
 
@@ -78,6 +82,13 @@ BACKGROUND_AUDIO_SOURCE = path.join('..', 'audio', 'background')
 # how to create the sound samples
 MAX_BACKGROUND_LAYERS = 4  # when creating a new sample sound
 NUM_IMAGES_TO_GENERATE_PER_CLASS = 10
+# clips mixed and transformed together for the types that support batches
+BATCH_SIZE = 32
+# random gain of each alarm and background layer, +/- dB
+LAYER_GAIN_DB = 0
+# mix cached STFTs of the sources instead of the audio, for the types computed from the STFT
+SPECTRAL_MIXING = False
+SPECTRAL_MIXING_TYPES = ['Std', 'Mel', 'harmonic', 'percussive']
 
 # Spectrogram Types to create
 SPECTROGRAM_TYPES = ['Std', 'Mel', 'QPlot-freq', 'reassigned', 'harmonic']
@@ -89,6 +100,10 @@ FREQ_LIMIT = [1000, 4000]
 SAMPLE_DURATION = 3
 SAMPLE_RATE = 48000
 SAMPLE_LEN = SAMPLE_RATE * SAMPLE_DURATION
+# librosa's default STFT, shared by the spectral mixing types
+N_FFT = 2048
+HOP_LENGTH = 512
+SAMPLE_FRAMES = 1 + SAMPLE_LEN // HOP_LENGTH
 
 # generated folders
 TOP_FOLDER = '../training-data'
@@ -96,6 +111,7 @@ DIR_PREFIX_WITH = 'alarm'
 DIR_PREFIX_WITHOUT = 'no_alarm'
 
 sample_cache = dict()
+stft_cache = dict()
 
 def get_wav_file_list(a_path):
     return glob.glob(path.join(a_path, '*.wav'))
@@ -147,6 +163,10 @@ def layer_sounds(alarm, backgrounds):
     return wav_data
 
 
+def get_random_gain():
+    return 10 ** (rnd.uniform(-LAYER_GAIN_DB, LAYER_GAIN_DB) / 20)
+
+
 def get_random_mixed_audio(with_alarm):
     if with_alarm:
         fname = rnd.choice(alarm_file_list)
@@ -154,20 +174,89 @@ def get_random_mixed_audio(with_alarm):
     else:
         wav_data = np.zeros(SAMPLE_LEN)
     wav_data = get_random_subset_of_waveform(wav_data)
-    wav_data = normalize_length(wav_data)
+    wav_data = normalize_length(wav_data) * get_random_gain()
 
     num_background_layers = rnd.randint(1, MAX_BACKGROUND_LAYERS)
     for _ in range(num_background_layers):
         background_fname = rnd.choice(background_file_list)
         background_wav = load_wav_file(background_fname)
         background_wav = normalize_length(background_wav)
-        wav_data += background_wav
+        wav_data += background_wav * get_random_gain()
     return wav_data
 
 
-def save_spectrograms_for(spectrogram_type, folder, wav_data, img_num):
+def load_stft(a_path):
+    if a_path in stft_cache:
+        return stft_cache[a_path]
+    # the STFT is linear, so the STFT of a mix is the sum of the STFTs of its layers
+    stft_cache[a_path] = stft(load_wav_file(a_path), n_fft=N_FFT, hop_length=HOP_LENGTH)
+    return stft_cache[a_path]
+
+
+def normalize_frames(frames):
+    # normalize_length with offsets snapped to the hop length
+    num_frames = frames.shape[1]
+    if num_frames > SAMPLE_FRAMES:
+        offset = rnd.randint(0, num_frames - SAMPLE_FRAMES)
+        return frames[:, offset:offset + SAMPLE_FRAMES]
+    elif num_frames < SAMPLE_FRAMES:
+        split = rnd.randint(0, SAMPLE_FRAMES - num_frames)
+        padded = np.zeros((frames.shape[0], SAMPLE_FRAMES), dtype=frames.dtype)
+        padded[:, split:split + num_frames] = frames
+        return padded
+    else:
+        return frames
+
+
+def get_random_subset_of_frames(frames):
+    max_len = frames.shape[1]
+    # just for the alarm sounds, take from 50% to 100% of the sample data
+    new_len = rnd.randrange(max_len // 2, max_len)
+    offset = rnd.randint(0, max_len - new_len)
+    return frames[:, offset:offset + new_len]
+
+
+def get_random_mixed_stft(with_alarm):
+    mixed = np.zeros((1 + N_FFT // 2, SAMPLE_FRAMES), dtype=np.complex64)
+    if with_alarm:
+        alarm = load_stft(rnd.choice(alarm_file_list))
+        mixed += normalize_frames(get_random_subset_of_frames(alarm)) * get_random_gain()
+
+    num_background_layers = rnd.randint(1, MAX_BACKGROUND_LAYERS)
+    for _ in range(num_background_layers):
+        background = load_stft(rnd.choice(background_file_list))
+        mixed += normalize_frames(background) * get_random_gain()
+    return mixed
+
+
+def is_spectrally_mixed(spectrogram_type):
+    return SPECTRAL_MIXING and spectrogram_type in SPECTRAL_MIXING_TYPES
+
+
+def get_batch_features(spectrogram_type, batch):
+    # spectrally mixed batches already hold the STFT of each clip
+    if is_spectrally_mixed(spectrogram_type):
+        if spectrogram_type in ['harmonic', 'percussive']:
+            return list(zip(*harmonic_percussive_stft(batch)))
+        return list(batch)
+    # constant-Q types share one set of kernels and transform the whole batch in one call
+    if spectrogram_type in ['QPlot-freq-band', 'QPlot-axis-band']:
+        return get_constant_q(SAMPLE_RATE, FREQ_LIMIT).transform(batch)
+    if spectrogram_type == 'Chroma-band':
+        return get_constant_q(SAMPLE_RATE, FREQ_LIMIT, bins_per_octave=36).chroma(batch)
+    if spectrogram_type in ['harmonic', 'percussive']:
+        return list(zip(*harmonic_percussive(batch)))
+    # band limited types decimate and transform the whole batch at once
+    if spectrogram_type in ['Std-band', 'Mel-band']:
+        S, band_sr, hop_length = band_spectrogram(batch, SAMPLE_RATE, FREQ_LIMIT, mel=spectrogram_type == 'Mel-band')
+        return [(spectrogram, band_sr, hop_length) for spectrogram in S]
+    return [None] * len(batch)
+
+
+def save_spectrograms_for(spectrogram_type, folder, wav_data, img_num, features=None):
     fname = f'{folder}/img_{img_num}.png'
-    plot_spectrogram(wav_data, SAMPLE_RATE, fileName=fname, spect_type=spectrogram_type, freq_range=FREQ_LIMIT)
+    plot_spectrogram(wav_data, SAMPLE_RATE, fileName=fname, spect_type=spectrogram_type, freq_range=FREQ_LIMIT,
+                     features=features)
 
 
 def get_output_folder_for(spectrogram_type, with_alarm, output_subfolder):
@@ -177,13 +266,32 @@ def get_output_folder_for(spectrogram_type, with_alarm, output_subfolder):
     return folder_name
 
 
-# for debugging
-os.chdir('clean_copy/util')
+alarm_file_list = []
+background_file_list = []
+
+
+def load_source_file_lists(alarm_source=ALARM_AUDIO_SOURCE, background_source=BACKGROUND_AUDIO_SOURCE):
+    global alarm_file_list, background_file_list, MAX_BACKGROUND_LAYERS
+    # get a list of all file names for alarm + background wav files
+    alarm_file_list = get_wav_file_list(alarm_source)
+    background_file_list = get_wav_file_list(background_source)
+    MAX_BACKGROUND_LAYERS = min(MAX_BACKGROUND_LAYERS, len(background_file_list))
+
 
-# get a list of all file names for alarm + background wav files
-alarm_file_list = get_wav_file_list(ALARM_AUDIO_SOURCE)
-background_file_list = get_wav_file_list(BACKGROUND_AUDIO_SOURCE)
-MAX_BACKGROUND_LAYERS = min(MAX_BACKGROUND_LAYERS, len(background_file_list))
+def generate_folder_images(spectrogram_type, folder, with_alarm, num_to_generate, img_num):
+    for batch_start in range(0, num_to_generate, BATCH_SIZE):
+        batch_len = min(BATCH_SIZE, num_to_generate - batch_start)
+        if is_spectrally_mixed(spectrogram_type):
+            batch = np.stack([get_random_mixed_stft(with_alarm) for _ in range(batch_len)])
+            batch_features = get_batch_features(spectrogram_type, batch)
+            batch = [None] * batch_len
+        else:
+            batch = np.stack([get_random_mixed_audio(with_alarm) for _ in range(batch_len)])
+            batch_features = get_batch_features(spectrogram_type, batch)
+        for wav_data, features in zip(batch, batch_features):
+            save_spectrograms_for(spectrogram_type, folder, wav_data, img_num, features)
+            img_num += 1
+    return img_num
 
 
 def generate_images():
@@ -193,11 +301,11 @@ def generate_images():
             for output_subfolder in ['train', 'test', 'validate']:
                 folder = get_output_folder_for(spectrogram_type, with_alarm, output_subfolder)
                 print(f'Creating images for {folder}')
-                for _ in range(NUM_IMAGES_TO_GENERATE_PER_CLASS):
-                    wav_data = get_random_mixed_audio(with_alarm)
-                    save_spectrograms_for(spectrogram_type, folder, wav_data, num_images)
-                    num_images += 1
+                num_images = generate_folder_images(spectrogram_type, folder, with_alarm,
+                                                    NUM_IMAGES_TO_GENERATE_PER_CLASS, num_images)
     print(f'Created {num_images} images')
 
 
-generate_images()
+if __name__ == '__main__':
+    load_source_file_lists()
+    generate_images()
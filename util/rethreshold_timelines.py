@@ -0,0 +1,229 @@
+"""
+Amazon Software License
+
+1. Definitions
+“Licensor” means any person or entity that distributes its Work.
+
+“Software” means the original work of authorship made available under this License.
+
+“Work” means the Software and any additions to or derivative works of the Software that are made available
+under this License.
+
+The terms “reproduce,” “reproduction,” “derivative works,” and “distribution” have the meaning as provided
+under U.S. copyright law; provided, however, that for the purposes of this License, derivative works shall
+not include works that remain separable from, or merely link (or bind by name) to the interfaces of, the Work.
+
+Works, including the Software, are “made available” under this License by including in or with the Work either
+(a) a copyright notice referencing the applicability of this License to the Work, or (b) a copy of this License.
+
+2. License Grants
+2.1 Copyright Grant. Subject to the terms and conditions of this License, each Licensor grants to you a perpetual,
+worldwide, non-exclusive, royalty-free, copyright license to reproduce, prepare derivative works of, publicly
+display, publicly perform, sublicense and distribute its Work and any resulting derivative works in any form.
+2.2 Patent Grant. Subject to the terms and conditions of this License, each Licensor grants to you a perpetual,
+worldwide, non-exclusive, royalty-free patent license to make, have made, use, sell, offer for sale, import,
+and otherwise transfer its Work, in whole or in part. The foregoing license applies only to the patent claims
+licensable by Licensor that would be infringed by Licensor’s Work (or portion thereof) individually and excluding
+any combinations with any other materials or technology.
+
+3. Limitations
+3.1 Redistribution. You may reproduce or distribute the Work only if (a) you do so under this License, (b) you include
+a complete copy of this License with your distribution, and (c) you retain without modification any copyright, patent,
+trademark, or attribution notices that are present in the Work.
+3.2 Derivative Works. You may specify that additional or different terms apply to the use, reproduction, and distribution
+of your derivative works of the Work (“Your Terms”) only if (a) Your Terms provide that the use limitation in Section 3.3
+applies to your derivative works, and (b) you identify the specific derivative works that are subject to Your Terms.
+Notwithstanding Your Terms, this License (including the redistribution requirements in Section 3.1) will continue to
+apply to the Work itself.
+3.3 Use Limitation. The Work and any derivative works thereof only may be used or intended for use with the web services,
+computing platforms or applications provided by Amazon.com, Inc. or its affiliates, including Amazon Web Services, Inc.
+3.4 Patent Claims. If you bring or threaten to bring a patent claim against any Licensor (including any claim,
+cross-claim or counterclaim in a lawsuit) to enforce any patents that you allege are infringed by any Work, then your
+rights under this License from such Licensor (including the grants in Sections 2.1 and 2.2) will terminate immediately.
+3.5 Trademarks. This License does not grant any rights to use any Licensor’s or its affiliates’ names, logos, or
+trademarks, except as necessary to reproduce the notices described in this License.
+3.6 Termination. If you violate any term of this License, then your rights under this License (including the grants
+in Sections 2.1 and 2.2) will terminate immediately.
+
+4. Disclaimer of Warranty.
+THE WORK IS PROVIDED “AS IS” WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, EITHER EXPRESS OR IMPLIED, INCLUDING WARRANTIES
+OR CONDITIONS OF M ERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, TITLE OR NON-INFRINGEMENT. YOU BEAR THE RISK OF
+UNDERTAKING ANY ACTIVITIES UNDER THIS LICENSE. SOME STATES’ CONSUMER LAWS DO NOT ALLOW EXCLUSION OF AN IMPLIED WARRANTY,
+SO THIS DISCLAIMER MAY NOT APPLY TO YOU.
+
+5. Limitation of Liability.
+EXCEPT AS PROHIBITED BY APPLICABLE LAW, IN NO EVENT AND UNDER NO LEGAL THEORY, WHETHER IN TORT (INCLUDING NEGLIGENCE),
+CONTRACT, OR OTHERWISE SHALL ANY LICENSOR BE LIABLE TO YOU FOR DAMAGES, INCLUDING ANY DIRECT, INDIRECT, SPECIAL,
+INCIDENTAL, OR CONSEQUENTIAL DAMAGES ARISING OUT OF OR RELATED TO THIS LICENSE, THE USE OR INABILITY TO USE THE WORK
+(INCLUDING BUT NOT LIMITED TO LOSS OF GOODWILL, BUSINESS INTERRUPTION, LOST PROFITS OR DATA, COMPUTER FAILURE OR
+MALFUNCTION, OR ANY OTHER COMM ERCIAL DAMAGES OR LOSSES), EVEN IF THE LICENSOR HAS BEEN ADVISED OF THE POSSIBILITY
+OF SUCH DAMAGES.
+
+Effective Date – April 18, 2008 © 2008 Amazon.com, Inc. or its affiliates. All rights reserved.
+"""
+
+import argparse
+import contextlib
+import glob
+import os.path as path
+import numpy as np
+
+# Suffix used by the inference pipeline when it stores a timeline
+TIMELINE_SUFFIX = '.timeline.npz'
+
+
+def timeline_model(data):
+    """
+    Name of the model that produced a stored timeline
+
+    Args:
+        data (numpy.lib.npyio.NpzFile): Opened timeline
+
+    Returns:
+        str: Label and ARN of the model, or 'unknown' for timelines without them
+    """
+    return ' '.join(str(data[name]) for name in ('label', 'model_arn') if name in data.files) or 'unknown'
+
+
+def load_timelines(a_path, model=None):
+    """
+    Load every timeline below a directory into one flat confidence array per model
+
+    A file analysed by several models has a <key>.<name>.timeline.npz per model,
+    so the timelines are grouped by the model ARN and label stored in them. The
+    timelines of a model are separated by a NaN entry so that runs of windows can
+    never continue from one file into the next.
+
+    Args:
+        a_path (str): Directory holding .timeline.npz files (e.g. from aws s3 sync)
+        model (str, optional): Only load timelines whose model label or ARN matches. Defaults to None.
+
+    Returns:
+        dict: model name to tuple(list[str], numpy.Array, numpy.Array, numpy.Array) of file
+            names, file index, offset and confidence for every window
+    """
+    file_names = sorted(glob.glob(path.join(a_path, '**', '*' + TIMELINE_SUFFIX), recursive=True))
+    models = {}
+    for file_name in file_names:
+        with np.load(file_name) as data:
+            name = timeline_model(data)
+            if model is not None and model not in (str(data[field]) for field in ('label', 'model_arn')
+                                                   if field in data.files):
+                continue
+            names, file_index, offsets, confidences = models.setdefault(name, ([], [], [], []))
+            num_windows = len(data['confidences'])
+            file_index.append(np.full(num_windows + 1, len(names), dtype=np.int32))
+            offsets.append(np.append(data['offsets'], np.float32(np.nan)))
+            confidences.append(np.append(data['confidences'], np.float32(np.nan)))
+            names.append(file_name)
+    return {name: (names, np.concatenate(file_index), np.concatenate(offsets), np.concatenate(confidences))
+            for name, (names, file_index, offsets, confidences) in sorted(models.items())}
+
+
+def find_runs(above):
+    """
+    Locate runs of consecutive windows above threshold, for every threshold at once
+
+    Args:
+        above (numpy.Array): (thresholds, windows) boolean array
+
+    Returns:
+        tuple(numpy.Array, numpy.Array, numpy.Array): threshold row, first window and
+            length of every run
+    """
+    padded = np.pad(above, ((0, 0), (1, 1))).astype(np.int8)
+    edges = np.diff(padded, axis=1)
+    start_rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    # nonzero walks row by row, so starts and ends pair up in order
+    return start_rows, starts, ends - starts
+
+
+def apply_thresholds(confidences, thresholds, min_windows=1):
+    """
+    Re-apply detection thresholds and an event rule over all timelines in one batch
+
+    An event is a run of at least min_windows consecutive windows with a
+    confidence at or above the threshold.
+
+    Args:
+        confidences (numpy.Array): Flat confidence array from load_timelines
+        thresholds (numpy.Array): Thresholds to evaluate
+        min_windows (int, optional): Consecutive windows needed for an event. Defaults to 1.
+
+    Returns:
+        tuple(numpy.Array, numpy.Array, numpy.Array): threshold row, first window and
+            length of every event
+    """
+    with np.errstate(invalid='ignore'):
+        above = confidences[np.newaxis, :] >= thresholds[:, np.newaxis]
+    rows, starts, lengths = find_runs(above)
+    keep = lengths >= min_windows
+    return rows[keep], starts[keep], lengths[keep]
+
+
+def summarize(file_names, file_index, thresholds, rows, starts):
+    """
+    Print the number of events and affected files for each threshold
+
+    Args:
+        file_names (list[str]): Timeline files
+        file_index (numpy.Array): File index of every window
+        thresholds (numpy.Array): Thresholds evaluated
+        rows (numpy.Array): Threshold row of every event
+        starts (numpy.Array): First window of every event
+    """
+    events = np.bincount(rows, minlength=len(thresholds))
+    print(f'{len(file_names)} timelines, {len(file_index) - len(file_names)} windows')
+    print('threshold  events  files')
+    for row, threshold in enumerate(thresholds):
+        files = len(np.unique(file_index[starts[rows == row]]))
+        print(f'{threshold:9.3f}  {events[row]:6d}  {files:5d}')
+
+
+def write_events(out, model, file_names, file_index, offsets, confidences, starts, lengths):
+    """
+    Write the events a model found for a single threshold as CSV rows
+
+    Args:
+        out (io.TextIOBase): Open CSV file
+        model (str): Model that produced the timelines
+        file_names (list[str]): Timeline files
+        file_index (numpy.Array): File index of every window
+        offsets (numpy.Array): Offset in seconds of every window
+        confidences (numpy.Array): Confidence of every window
+        starts (numpy.Array): First window of every event
+        lengths (numpy.Array): Number of windows in every event
+    """
+    for start, length in zip(starts, lengths):
+        peak = confidences[start:start + length].max()
+        out.write(f'{model},{file_names[file_index[start]]},{offsets[start]:.3f},'
+                  f'{offsets[start + length - 1]:.3f},{length},{peak:.4f}\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-apply thresholds to stored confidence timelines')
+    parser.add_argument('timeline_dir', help='Directory holding .timeline.npz files')
+    parser.add_argument('--thresholds', type=float, nargs='+', default=[0.80, 0.85, 0.90, 0.95])
+    parser.add_argument('--min-windows', type=int, default=1,
+                        help='Consecutive windows above threshold needed for an event')
+    parser.add_argument('--model', help='Only evaluate the timelines of the model with this label or ARN')
+    parser.add_argument('--events-csv', help='Write the events for the first threshold to this file')
+    args = parser.parse_args()
+
+    models = load_timelines(args.timeline_dir, args.model)
+    thresholds = np.array(args.thresholds, dtype=np.float32)
+    with open(args.events_csv, 'w') if args.events_csv else contextlib.nullcontext() as out:
+        if out:
+            out.write('model,file,start,end_window_start,windows,max_confidence\n')
+        for model, (file_names, file_index, offsets, confidences) in models.items():
+            rows, starts, lengths = apply_thresholds(confidences, thresholds, args.min_windows)
+            print(f'model {model}')
+            summarize(file_names, file_index, thresholds, rows, starts)
+            if out:
+                first = rows == 0
+                write_events(out, model, file_names, file_index, offsets, confidences, starts[first], lengths[first])
+
+
+if __name__ == '__main__':
+    main()